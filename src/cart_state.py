@@ -3,13 +3,12 @@ import jac_sw
 import sys
 import logging
 import time
-import pprint
+import json
 import namakanui.cart
 import namakanui.util
 import namakanui.ini
 
-logging.root.setLevel(logging.DEBUG)
-logging.root.addHandler(logging.StreamHandler())
+namakanui.util.setup_logging()
 
 binpath, datapath = namakanui.util.get_paths()
 
@@ -20,4 +19,4 @@ if len(sys.argv) > 1:
 cart = namakanui.cart.Cart(band, datapath+'band%d.ini'%(band), sleep=time.sleep, publish=namakanui.nop)
 cart.power(1)
 cart.update_all()
-pprint.pprint(cart.state)
+sys.stdout.write(json.dumps(cart.state, default=str, indent=2) + '\n')
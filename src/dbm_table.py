@@ -11,7 +11,9 @@ This script instantiates a Cart instance directly, rather than
 communicating with a running engineering task via DRAMA.  The two
 probably shouldn't run at the same time.
 
-The <dbm> parameter gives the starting dBm setting at each frequency;
+The <dbm> parameter gives the starting dBm setting for the first frequency;
+after a successful tune, each following frequency starts from the previous
+frequency's final dBm.
 For a new table on an unknown setup it's safest to start at -20.
 You can also give "ini-X" for this parameter to start with the value
 interpolated from the table in the agilent.ini file, minus X dBm.
@@ -51,7 +53,7 @@ import namakanui.sim as sim
 from namakanui_tune import tune
 
 
-namakanui.util.setup_logging(logging.DEBUG)
+namakanui.util.setup_logging()
 
 config = namakanui.util.get_config()
 bands = namakanui.util.get_bands(config, simulated=False)
@@ -63,8 +65,9 @@ parser = argparse.ArgumentParser(
 parser.add_argument('band', type=int, choices=bands)
 parser.add_argument('lo_ghz', help='LO GHz range, first:last:step')
 parser.add_argument('lock_side', choices=['below','above'])
-parser.add_argument('dbm', help='starting output power, dbm or ini[-offset]'))
+parser.add_argument('dbm', help='starting output power, dbm or ini[-offset]')
 parser.add_argument('--lock_only', action='store_true', help='skip mixer adjustment')
+parser.add_argument('--settle_tol', type=float, help='end PLL settle delay early once IF power\nstops changing by more than this many volts')
 args = parser.parse_args()
 
 los = namakanui.util.parse_range(args.lo_ghz, maxlen=100e3)
@@ -101,16 +104,26 @@ if args.lock_only:
 
 reference = instrument.reference  # shorten name for adjust_dbm()
 
+# after the first successful tune, start each LO from the previous
+# converged dbm, since the required power changes slowly with frequency.
+last_dbm = None
+
 def adjust_dbm(lo_ghz):
+    global last_dbm
     # sanity check, avoid setting reference for impossible freqs
     lo_min = cart.yig_lo * cart.cold_mult * cart.warm_mult
     lo_max = cart.yig_hi * cart.cold_mult * cart.warm_mult
     if lo_ghz < lo_min or lo_ghz > lo_max:
         logging.error('skipping lo_ghz %g, outside range [%.3f, %.3f] for band %d', lo_ghz, lo_min, lo_max, args.band)
         return
+    if last_dbm is None:
+        dbm_ini, dbm_start = use_ini, args.dbm
+    else:
+        dbm_ini, dbm_start = False, last_dbm
     if tune(instrument, args.band, lo_ghz, pll_if=[-1.4,-1.6],
-            dbm_ini=use_ini, dbm_start=args.dbm, dbm_max=reference.max_dbm,
-            lock_only=args.lock_only):
+            dbm_ini=dbm_ini, dbm_start=dbm_start, dbm_max=reference.max_dbm,
+            lock_only=args.lock_only, settle_tol=args.settle_tol):
+        last_dbm = reference.state['dbm']
         sys.stdout.write('%.3f %6.2f %.3f %.3f %.3f\n' % (lo_ghz, reference.state['dbm'], cart.state['pll_if_power'], cart.state['pa_drain_s'][0], cart.state['pa_drain_s'][1]))
         sys.stdout.flush()
 
@@ -36,6 +36,7 @@ import os
 import time
 import logging
 import argparse
+import numpy
 import namakanui.instrument
 import namakanui.util
 from namakanui_tune import tune
@@ -70,17 +71,14 @@ sys.stdout.write(time.strftime('# %Y%m%d %H:%M:%S HST\n', time.localtime()))
 sys.stdout.write('# %s\n'%(sys.argv))
 sys.stdout.write('# load: %s\n'%(args.load))
 sys.stdout.write('#\n')
-sys.stdout.write('#lo_ghz pa_3v pa_5v ')
+# column order matches the data rows: per-PA supply voltages come first.
+cols = ['#lo_ghz']
 for pa in pas:
-    for mixer in ['01', '02', '11', '12']:
-        sys.stdout.write('ua%s_%03d '%(mixer, pa*100))
-    for po in ['0', '1']:
-        sys.stdout.write('vd%s_%03d '%(po, pa*100))
-    for po in ['0', '1']:
-        sys.stdout.write('id%s_%03d '%(po, pa*100))
-    for po in ['0', '1']:
-        sys.stdout.write('vg%s_%03d '%(po, pa*100))
-sys.stdout.write('\n')
+    pa100 = int(pa*100)
+    cols += ['pa_3v_%03d'%(pa100), 'pa_5v_%03d'%(pa100)]
+    cols += ['ua%s_%03d'%(mixer, pa100) for mixer in ['01', '02', '11', '12']]
+    cols += ['%s%s_%03d'%(name, po, pa100) for name in ['vd', 'id', 'vg'] for po in ['0', '1']]
+sys.stdout.write(' '.join(cols) + '\n')
 sys.stdout.flush()
 
 instrument = namakanui.instrument.Instrument(config)
@@ -93,57 +91,68 @@ cart.set_lock_side(args.lock_side)
 
 
 x = []
-y = [[], [], [], []]
-# we need a y for each mixer and pa; y[mixer][pa_index] is an array of len(x)
-for i in range(4):
-    for pa in pas:
-        y[i].append([])
+# we need a y for each mixer and pa; y[mixer,pa_index] is an array of len(x).
+# preallocate for every LO; skipped LOs are trimmed off before plotting.
+y = numpy.empty((4, len(pas), len(los)))
+
+mixers = [(0,0), (0,1), (1,0), (1,1)]  # (po,sb), index po*2+sb
+
+# bind femc getters locally since they are called many times per LO
+femc = cart.femc
+ca = cart.ca
+get_pa_3v = femc.get_cartridge_lo_pa_supply_voltage_3v
+get_pa_5v = femc.get_cartridge_lo_pa_supply_voltage_5v
+get_sis_current = femc.get_sis_current
+get_pa_vg = femc.get_cartridge_lo_pa_gate_voltage
+get_pa_vd = femc.get_cartridge_lo_pa_drain_voltage
+get_pa_id = femc.get_cartridge_lo_pa_drain_current
 
 # main loop
 for lo in los:
     if not tune(instrument, band, lo, skip_servo_pa=True):
         continue
+    li = len(x)  # LO index into y
     x.append(lo)
-    sys.stdout.write('%.3f '%(lo))
+    row = [f'{lo:.3f}']  # written as a single line once all PAs are done
     for j,pa in enumerate(pas):
         cart._set_pa([pa,pa])
         time.sleep(0.05)
         # check voltages
-        pa_3v = cart.femc.get_cartridge_lo_pa_supply_voltage_3v(cart.ca)
-        pa_5v = cart.femc.get_cartridge_lo_pa_supply_voltage_5v(cart.ca)
-        sys.stdout.write('%.3f %.3f '%(pa_3v, pa_5v))
+        pa_3v = get_pa_3v(ca)
+        pa_5v = get_pa_5v(ca)
+        row.append(f'{pa_3v:.3f} {pa_5v:.3f}')
         # average mixer currents
         n = 10
-        uas = [0.0]*4
+        uas = numpy.zeros(4)
         for i in range(n):
-            for po in range(2):
-                for sb in range(2):
-                    uas[po*2 + sb] += cart.femc.get_sis_current(cart.ca,po,sb)*1e3
+            for k,(po,sb) in enumerate(mixers):
+                uas[k] += get_sis_current(ca,po,sb)
+        uas *= 1e3/n  # mA to uA, scaled once after summing
         for i in range(4):
-            uas[i] /= n
-            sys.stdout.write('%.3f '%(uas[i]))
-            y[i][j].append(uas[i])
+            row.append(f'{uas[i]:.3f}')
+            y[i,j,li] = uas[i]
         # amp feedback
         pa_vd = [0.0]*2
         pa_id = [0.0]*2
         pa_vg = [0.0]*2
         for po in range(2):
-            pa_vg[po] = cart.femc.get_cartridge_lo_pa_gate_voltage(cart.ca, po)
-            pa_vd[po] = cart.femc.get_cartridge_lo_pa_drain_voltage(cart.ca, po)
-            pa_id[po] = cart.femc.get_cartridge_lo_pa_drain_current(cart.ca, po)
-        sys.stdout.write('%.3f %.3f '%(pa_vd[0], pa_vd[1]))
-        sys.stdout.write('%.3f %.3f '%(pa_id[0], pa_id[1]))
-        sys.stdout.write('%.3f %.3f '%(pa_vg[0], pa_vg[1]))
-    sys.stdout.write('\n')
+            pa_vg[po] = get_pa_vg(ca, po)
+            pa_vd[po] = get_pa_vd(ca, po)
+            pa_id[po] = get_pa_id(ca, po)
+        row.append(f'{pa_vd[0]:.3f} {pa_vd[1]:.3f}')
+        row.append(f'{pa_id[0]:.3f} {pa_id[1]:.3f}')
+        row.append(f'{pa_vg[0]:.3f} {pa_vg[1]:.3f}')
+    sys.stdout.write(' '.join(row) + '\n')
     sys.stdout.flush()
 
 # make a set of plots, one subplot per mixer
 logging.info('done.  creating plot...')
 from pylab import *
+y = y[:,:,:len(x)]
 for i in range(4):
     p = subplot(2,2,i+1)
     for j,pa in enumerate(pas):
-        p.plot(x,y[i][j])
+        p.plot(x,y[i,j])
     p.grid()
 show()
 
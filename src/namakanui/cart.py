@@ -1391,11 +1391,11 @@ class Cart(object):
             return
         if not self.state['pd_enable']:
             raise RuntimeError(self.name + ' power disabled')
-        for po in range(2):
-            self.femc.set_cartridge_lo_pa_pol_drain_voltage_scale(self.ca, po, pa[po])
-            self.state['pa_drain_s'][po] = pa[po]
-            if len(pa) > 2:
-                self.femc.set_cartridge_lo_pa_pol_gate_voltage(self.ca, po, pa[po+2])
+        # both polarizations at once, pipelined
+        self.femc.set_cartridge_lo_pa_drain_voltage_scales(self.ca, pa[0:2])
+        self.state['pa_drain_s'][0:2] = pa[0:2]
+        if len(pa) > 2:
+            self.femc.set_cartridge_lo_pa_gate_voltages(self.ca, pa[2:4])
         # Cart._set_pa
 
 
@@ -457,10 +457,11 @@ class FEMC(object):
                 | lpr_temp<<4
         
     
-    def set_rca(self, rca, data):
+    def set_rca(self, rca, data, clear=True):
         '''Send SocketCAN packet to RCA with packed data bytes.
            Before sending, empties the socket of any waiting data --
            these are commands/replies of any concurrent clients.
+           Pass clear=False to keep earlier replies, as in get_rcas.
            The transmit queue is very shallow, so we select() until
            the socket is writable, then try to send until timeout.
            '''
@@ -470,8 +471,11 @@ class FEMC(object):
         else:
             packet = _IB3x8s.pack(socket.CAN_EFF_FLAG | self.node | rca, len(data), data)
         plen = len(packet)
-        self.log.debug('set_rca send %d bytes: 0x%s', plen, packet.hex())
-        self.clear()  # empty socket buffer of any nonrelated traffic
+        # every monitor point goes through here; skip the hex dump unless debugging
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug('set_rca send %d bytes: 0x%s', plen, packet.hex())
+        if clear:
+            self.clear()  # empty socket buffer of any nonrelated traffic
         timeout = self.s_tx.gettimeout() or 0
         wall_timeout = time.time() + timeout
         while timeout >= 0:
@@ -500,7 +504,7 @@ class FEMC(object):
         r_can_id = None
         data_len = 0
         timeout = time.time() + (self.s_rx.gettimeout() or 0)
-        badreps = []
+        badreps = 0
         plen = 16
         if self.pcan:
             plen = 36
@@ -511,20 +515,21 @@ class FEMC(object):
                 break
             if len(reply) != plen:
                 raise FEMC_RuntimeError("only received %d/%d bytes: 0x%s" % (len(reply), plen,  reply.hex()))
-            self.log.debug('get_rca recv %d bytes: 0x%s', len(reply), reply.hex())
+            if self.log.isEnabledFor(logging.DEBUG):
+                self.log.debug('get_rca recv %d bytes: 0x%s', len(reply), reply.hex())
             if self.pcan:
                 plen, mtype, data_len, flags, r_can_id, data = _HH8x8xxBHI8s.unpack(reply)
             else:
                 r_can_id, data_len, data = _IB3x8s.unpack(reply)
             r_can_id &= socket.CAN_EFF_MASK
             if r_can_id != s_can_id:
-                badreps.append(reply.hex())
+                badreps += 1
                 self.log.debug('get_rca %x unexpected reply id %x', s_can_id, r_can_id)
             elif not data_len:
-                badreps.append(reply.hex())
+                badreps += 1
                 self.log.debug('get_rca %x got reply with no data', s_can_id)
         if r_can_id != s_can_id or not data_len:
-            raise FEMC_RuntimeError("timeout after %d bad replies: %s" % (len(badreps), "<omitted>"))#badreps))
+            raise FEMC_RuntimeError("timeout after %d bad replies" % (badreps))
         data = data[:data_len]
         return data
     
@@ -544,6 +549,48 @@ class FEMC(object):
                 if loop >= loops:
                     raise
     
+    def get_rcas(self, rcas):
+        '''Get several RCAs, returning a list of reply data bytes.
+           All requests are sent before reading any replies, so the round
+           trips overlap instead of adding up.  Replies are matched by CAN id,
+           in request order for a repeated RCA; any RCA still missing at
+           timeout falls back to get_rca.'''
+        index = {}  # can id: [indices still waiting for a reply]
+        for i,rca in enumerate(rcas):
+            index.setdefault(self.node | rca, []).append(i)
+        replies = [None]*len(rcas)
+        self.clear()
+        for rca in rcas:
+            self.set_rca(rca, b'', clear=False)
+        remaining = len(rcas)
+        rx_timeout = self.s_rx.gettimeout() or 0
+        timeout = time.time() + rx_timeout
+        plen = 16
+        if self.pcan:
+            plen = 36
+        while remaining and time.time() < timeout:
+            try:
+                reply = self.s_rx.recv(plen)
+            except socket.timeout:
+                break
+            if len(reply) != plen:
+                raise FEMC_RuntimeError("only received %d/%d bytes: 0x%s" % (len(reply), plen,  reply.hex()))
+            if self.pcan:
+                plen, mtype, data_len, flags, r_can_id, data = _HH8x8xxBHI8s.unpack(reply)
+            else:
+                r_can_id, data_len, data = _IB3x8s.unpack(reply)
+            waiting = index.get(r_can_id & socket.CAN_EFF_MASK)
+            if not waiting or not data_len:
+                continue  # other traffic, outgoing command, or extra reply
+            replies[waiting.pop(0)] = data[:data_len]
+            remaining -= 1
+            timeout = time.time() + rx_timeout  # long batches keep going
+        for i,rca in enumerate(rcas):
+            if replies[i] is None:
+                self.log.debug('get_rcas no reply for 0x%x, retrying', self.node | rca)
+                replies[i] = self.get_rca(rca)
+        return replies
+    
     def set_special(self, rca_offset, ubyte=0):
         '''Send a SPECIAL control command, base 0x21000'''
         self.set_rca(0x21000 | rca_offset, _B.pack(ubyte))
@@ -558,6 +605,11 @@ class FEMC(object):
            On error, raise a FEMC_RuntimeError exception.'''
         self.set_rca(rca, data)
         r_data = self.try_get_rca(rca)
+        self.check_set_reply(rca, data, r_data)
+    
+    def check_set_reply(self, rca, data, r_data):
+        '''Check r_data from a get after setting rca to data.
+           On error, raise a FEMC_RuntimeError exception.'''
         # TODO: certain operations might require action for specific errors,
         # so it'd be better to raise an exception that's easier to check.
         if r_data[-1] != 0:
@@ -599,6 +651,24 @@ class FEMC(object):
         '''Send a STANDARD control command, base 0x10000, with float value.'''
         self.set_get_rca(0x10000 | rca_offset, _f.pack(value))
     
+    def set_standard_floats(self, rca_offsets, values):
+        '''Pipelined set_standard_float for several distinct rca_offsets.
+           Sends all the control packets, then checks them together with
+           get_rcas; any that didn't take are redone with set_get_rca.'''
+        rcas = [0x10000 | rca_offset for rca_offset in rca_offsets]
+        datas = [_f.pack(value) for value in values]
+        self.clear()
+        for rca,data in zip(rcas, datas):
+            self.set_rca(rca, data, clear=False)
+        for rca,data,r_data in zip(rcas, datas, self.get_rcas(rcas)):
+            try:
+                self.check_set_reply(rca, data, r_data)
+            except FEMC_RuntimeError as e:
+                if str(e).startswith('error code'):
+                    raise
+                self.log.debug('set_standard_floats %s', e)
+                self.set_get_rca(rca, data)
+    
     def get_standard_ubyte(self, rca_offset):
         '''Send a STANDARD monitor command, base 0x00000; return ubyte value.'''
         d = self.get_rca(0x00000 | rca_offset)
@@ -624,6 +694,15 @@ class FEMC(object):
     def get_standard_float(self, rca_offset):
         '''Send a STANDARD monitor command, base 0x00000; return float value.'''
         d = self.get_rca(0x00000 | rca_offset)
+        return self.unpack_standard_float(rca_offset, d)
+    
+    def get_standard_floats(self, rca_offsets):
+        '''Pipelined get_standard_float for several rca_offsets.'''
+        ds = self.get_rcas([0x00000 | rca_offset for rca_offset in rca_offsets])
+        return [self.unpack_standard_float(r,d) for r,d in zip(rca_offsets, ds)]
+    
+    def unpack_standard_float(self, rca_offset, d):
+        '''Check STANDARD monitor reply data bytes d; return float value.'''
         if d[-1] != 0:
             e = _b.unpack(d[-1:])[0]  # d[-1] is unsigned; must unpack
             estr = _errors.get(e, "unrecognized error code")
@@ -905,6 +984,18 @@ class FEMC(object):
         rca_offset = self.make_rca(cartridge=ca, polarization=po, sideband=sb) | _sis_current
         return self.get_standard_float(rca_offset)
     
+    def get_sis_currents(self, ca, n=1):
+        '''Get all four SIS mixer currents in mA for cartridge,
+           ordered [po*2 + sb], with one pipelined round trip.
+           If n > 1, return the average of n readings, all pipelined together.'''
+        rca_offsets = [self.make_rca(cartridge=ca, polarization=po, sideband=sb) | _sis_current
+                       for po in range(2) for sb in range(2)]
+        if n <= 1:
+            return self.get_standard_floats(rca_offsets)
+        # pipeline all n readings at once
+        readings = self.get_standard_floats(rca_offsets*n)
+        return [sum(readings[j::4])/n for j in range(4)]
+    
     def get_sis_open_loop(self, ca, po, sb):
         '''Get SIS mixer operation mode for cartridge, polarization, sideband.
              0: Close loop (power up state)
@@ -1059,6 +1150,12 @@ class FEMC(object):
         rca_offset = self.make_rca(cartridge=ca, pa_channel=po) | _lo_pa_gate_voltage
         self.set_standard_float(rca_offset, volts)
     
+    def set_cartridge_lo_pa_gate_voltages(self, ca, volts):
+        '''Set PA gate voltages [po0, po1] with one pipelined round trip.'''
+        rca_offsets = [self.make_rca(cartridge=ca, pa_channel=po) | _lo_pa_gate_voltage
+                       for po in range(2)]
+        self.set_standard_floats(rca_offsets, volts)
+    
     def set_cartridge_lo_pa_pol_drain_voltage_scale(self, ca, po, scale):
         '''Set unitless PA scaling factor; 0 is 0V, 5 is max drain voltage.
            If dewar 4K stage or 12K stage temperature is above 30K,
@@ -1066,6 +1163,12 @@ class FEMC(object):
            is raised.  Likewise if 4K/12K temperature values are unavailable.'''
         rca_offset = self.make_rca(cartridge=ca, pa_channel=po) | _lo_pa_drain_voltage
         self.set_standard_float(rca_offset, scale)
+    
+    def set_cartridge_lo_pa_drain_voltage_scales(self, ca, scales):
+        '''Set PA drain voltage scales [po0, po1] with one pipelined round trip.'''
+        rca_offsets = [self.make_rca(cartridge=ca, pa_channel=po) | _lo_pa_drain_voltage
+                       for po in range(2)]
+        self.set_standard_floats(rca_offsets, scales)
         
     ########### warm cartridge assembly (LO) GET commands ###########
     
@@ -43,6 +43,7 @@ class IncludeParser(configparser.ConfigParser):
         self.inifilename = inifilename
         inidone = set()
         include = {inifilename}
+        self.inifiles = inidone  # all files parsed, including [include]s
         while inidone < include:
             fname = next(iter(include - inidone))
             inidir = os.path.dirname(fname) + '/'
@@ -59,6 +60,28 @@ class IncludeParser(configparser.ConfigParser):
                     include.add(fname)
 
 
+_include_parser_cache = {}  # realpath: (mtimes, IncludeParser)
+
+def cached_include_parser(inifilename):
+    '''
+    Return an IncludeParser for given .ini file, reusing the instance from
+    a previous call unless any of its files have been modified since.
+    NOTE: The returned instance is shared; callers must not modify it.
+    '''
+    inifilename = os.path.realpath(inifilename.strip())
+    mtimes, config = _include_parser_cache.get(inifilename, (None, None))
+    if config is not None:
+        try:
+            if mtimes == {f: os.path.getmtime(f) for f in config.inifiles}:
+                return config
+        except OSError:
+            pass  # an included file was removed; reparse and raise there
+    config = IncludeParser(inifilename)
+    mtimes = {f: os.path.getmtime(f) for f in config.inifiles}
+    _include_parser_cache[inifilename] = (mtimes, config)
+    return config
+
+
 def read_table(config_section, name, dtype, fnames):
     '''
     Return a table from a section of the config file.  Arguments:
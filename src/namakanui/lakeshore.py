@@ -22,7 +22,7 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 from namakanui.ini import *
 from namakanui import sim
-import logging, socket, select, os
+import logging, socket
 
 class Lakeshore(object):
     '''
@@ -38,7 +38,7 @@ class Lakeshore(object):
         '''
         self.config = inifile
         if not hasattr(inifile, 'items'):
-            self.config = IncludeParser(inifile)
+            self.config = cached_include_parser(inifile)
         myconfig = self.config['lakeshore']
         self.sleep = sleep
         self.publish = publish
@@ -58,6 +58,10 @@ class Lakeshore(object):
             self.gpib_addr = int(myconfig['gpib_addr'])
             self.gpib_tmo_ms = int(myconfig['gpib_tmo_ms'])
         
+        # create socket here so close() always works
+        self.s = socket.socket()
+        self.rfile = self.s.makefile('rb')
+        
         self.log.debug('__init__ %s, sim=%d, %s:%d',
                        self.config.inifilename, self.simulate, self.ip, self.port)
         
@@ -68,6 +72,39 @@ class Lakeshore(object):
     
     def __del__(self):
         self.log.debug('__del__')
+        self.close()
+    
+    def close(self):
+        '''Close the connection'''
+        self.log.debug('close')
+        self.rfile.close()
+        self.s.close()
+    
+    def connect(self):
+        '''(Re)open the connection to the Lakeshore, setting up the GPIB converter if needed.
+           The old socket is only replaced once the new one has connected.'''
+        self.log.debug('connecting Lakeshore, %s:%d', self.ip, self.port)
+        s = socket.socket()
+        try:
+            s.settimeout(self.timeout)
+            s.connect((self.ip, self.port))
+            s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except:
+            s.close()
+            raise
+        self.close()
+        self.s = s
+        self.rfile = s.makefile('rb')  # buffered reader for CRLF-terminated replies
+        if self.gpib:
+            # Prologix setup, sent as a single packet:
+            #   ++mode 1: set mode as CONTROLLER
+            #   ++addr N: set Lakeshore GPIB address
+            #   ++auto 1: turn on read-after-write
+            #     (no need for ++read_tmo_ms with ++auto 1)
+            #   ++eos 3:  do not append CR or LF to GPIB data
+            #   ++eoi 1:  assert EOI with last byte to indicate end of data
+            self.s.sendall(b'++mode 1\n++addr %d\n++auto 1\n++eos 3\n++eoi 1\n'%(self.gpib_addr))
+        # Lakeshore.connect
 
     def initialise(self):
         '''Open the connections to the Lakeshore and get/publish state.'''
@@ -79,7 +116,9 @@ class Lakeshore(object):
         self.state['simulate'] = self.simulate
         self.state['sim_text'] = sim.bits_to_str(self.simulate)
         
-        if not self.simulate & sim.SIM_LAKESHORE:    
+        self.close()
+        if not self.simulate & sim.SIM_LAKESHORE:
+            self.connect()
             self.cmd('*CLS')
             idn = self.cmd('*IDN?')
             self.log.debug('Lakeshore IDN: %s', idn)
@@ -95,7 +134,7 @@ class Lakeshore(object):
             self.state['temp'] = [4.0, 4.0, 15.0, 90.0, 273.0]
         else:
             krdg = self.cmd('KRDG? 0')
-            self.state['temp'] = [float(x.strip()) for x in krdg.split(',')]
+            self.state['temp'] = list(map(float, krdg.split(',')))  # float() ignores whitespace
         
         self.state['number'] += 1
         self.publish(self.name, self.state)
@@ -109,42 +148,41 @@ class Lakeshore(object):
         if hasattr(c, 'encode'):
             c = c.encode()  # convert to bytes
 
-        # reconnect every time since Lakeshore disconnects us too quickly
-        self.log.debug('connecting Lakeshore, %s:%d', self.ip, self.port)
-        s = socket.socket()
-        s.settimeout(self.timeout)
-        s.connect((self.ip, self.port))
-        if self.gpib:
-            # Set mode as CONTROLLER
-            s.sendall(b'++mode 1\n')
-            # Set Lakeshore GPIB address
-            s.sendall(b'++addr %d\n'%(self.gpib_addr))
-            # Turn on read-after-write
-            s.sendall(b'++auto 1\n')
-            # Set read timeout in milliseconds (no need if ++auto 1)
-            #s.sendall(b'++read_tmo_ms %d\n'%(self.gpib_tmo_ms))
-            # Do not append CR or LF to GPIB data
-            s.sendall(b'++eos 3\n')
-            # Assert EOI with last byte to indicate end of data
-            s.sendall(b'++eoi 1\n')
-
-        # clear out any leftover junk in the socket because the GPIB
-        # converter seems to duplicate results in its buffer
-        while select.select([s],[],[],0.0)[0]:
-            s.recv(64)
+        # not connected, e.g. an earlier initialise() failed to connect
+        if self.rfile.closed:
+            self.connect()
+        
+        # the Lakeshore may drop an idle connection, so retry once after reconnecting
+        try:
+            r = self.transact(c)
+        except (OSError, socket.timeout) as e:
+            self.log.debug('reconnecting after error: %s', e)
+            self.connect()
+            r = self.transact(c)
         
-        s.sendall(c + b'\r\n')
-
-        # always read reply since we set ++auto 1,
-        # but if this cmd was not a query it will be junk
-        r = b''
-        while b'\r\n' not in r:
-            r += s.recv(4096)
-
-        self.log.debug('close')
-        s.close()
         self.log.debug('cmd: %s; reply: %s', c, r)
         if b'?' in c:
             return r.strip().decode()  # convert to str
         # Lakeshore.cmd
+    
+    def transact(self, c):
+        '''Send bytes cmd c on the open socket and return raw bytes reply.'''
+        # clear out any leftover junk in the socket and read buffer because
+        # the GPIB converter seems to duplicate results in its buffer
+        self.s.settimeout(0.0)
+        try:
+            while self.rfile.read1(4096):
+                pass
+        finally:
+            self.s.settimeout(self.timeout)
+        
+        self.s.sendall(c + b'\r\n')
+
+        # always read reply since we set ++auto 1,
+        # but if this cmd was not a query it will be junk
+        r = self.rfile.readline()
+        if not r:
+            raise ConnectionResetError('connection closed by Lakeshore')
+        return r
+        # Lakeshore.transact
 
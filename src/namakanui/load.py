@@ -48,7 +48,6 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 from namakanui.ini import IncludeParser
 from namakanui import sim
 import socket
-import select
 import time
 import logging
 
@@ -206,16 +205,33 @@ class Load(object):
                     self.port, attempt+1)
 
         if self.socket_reuse:
-            # clear out any leftover junk on the socket before sending
-            while select.select([self.s],[],[],0.0)[0]:
-                self.s.recv(64)
+            # clear out any leftover junk on the socket before sending.
+            # MSG_DONTWAIT alone isn't enough here: python polls a socket
+            # with a timeout before calling recv, so it would wait out the
+            # full timeout and raise.  drop to non-blocking mode instead.
+            self.s.settimeout(0.0)
+            try:
+                while self.s.recv(64):
+                    pass
+            except BlockingIOError:
+                pass
+            finally:
+                self.s.settimeout(self.timeout)
         
         c = c.encode()  # needs to be bytes
         self.log.debug('cmd: %s', c)
         self.s.sendall(c)
-        r = b''
-        while not b'\r\n' in r:
-            r += self.s.recv(64)
+        # accumulate in a bytearray, only searching the new data for CRLF
+        r = bytearray()
+        i = -1
+        while i < 0:
+            b = self.s.recv(64)
+            if not b:
+                raise ConnectionResetError('connection closed by %s:%d'%(self.cms, self.port))
+            start = max(0, len(r) - 1)  # CRLF may straddle recvs
+            r += b
+            i = r.find(b'\r\n', start)
+        r = bytes(r)
         
         if not self.socket_reuse:
             self.close()
@@ -24,7 +24,6 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 from namakanui.ini import *
 from namakanui import sim
 import socket
-import select
 import logging
 
 
@@ -34,6 +33,10 @@ enq = b'\x05'
 ack = b'\x06'
 nak = b'\x15'
 
+# gauge status codes returned by PRx queries, indexed by code
+STATES = ('okay', 'underrange', 'overrange', 'sensor error',
+          'sensor off', 'no sensor', 'id error')
+
 
 class Pfeiffer(object):
     '''
@@ -49,7 +52,7 @@ class Pfeiffer(object):
         '''
         self.config = inifile
         if not hasattr(inifile, 'items'):
-            self.config = IncludeParser(inifile)
+            self.config = cached_include_parser(inifile)
         myconfig = self.config['vacuum']  # generic config
         self.sleep = sleep
         self.publish = publish
@@ -64,6 +67,7 @@ class Pfeiffer(object):
         
         # create socket here so close() always works
         self.s = socket.socket()
+        self.rfile = self.s.makefile('rb')
         
         self.log.debug('__init__ %s, sim=%d, %s:%d',
                        self.config.inifilename, self.simulate, self.ip, self.port)
@@ -82,9 +86,28 @@ class Pfeiffer(object):
     def close(self):
         '''Close the connection'''
         self.log.debug('close')
+        self.rfile.close()
         self.s.close()
     
     
+    def connect(self):
+        '''(Re)open the connection to the Pfeiffer.
+           The old socket is only replaced once the new one has connected.'''
+        self.log.debug('connecting Pfeiffer, %s:%d', self.ip, self.port)
+        s = socket.socket()
+        try:
+            s.settimeout(self.timeout)
+            s.connect((self.ip, self.port))
+            s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except:
+            s.close()
+            raise
+        self.close()
+        self.s = s
+        self.rfile = s.makefile('rb')  # buffered reader for CRLF-terminated replies
+        # Pfeiffer.connect
+    
+    
     def initialise(self):
         '''Open the connections to the Pfeiffer and get/publish state.'''
         self.log.debug('initialise')
@@ -97,10 +120,7 @@ class Pfeiffer(object):
         
         self.close()
         if not self.simulate & sim.SIM_VACUUM:
-            self.log.debug('connecting Pfeiffer, %s:%d', self.ip, self.port)
-            self.s = socket.socket()
-            self.s.settimeout(self.timeout)
-            self.s.connect((self.ip, self.port))
+            self.connect()
             # clear input buffer / reset the interface, which destroys the socket.
             #self.cmd(etx)
             ''' NOTE: The ? mark in the cmd() argument is intensionally attached to request returned values. '''
@@ -131,20 +151,15 @@ class Pfeiffer(object):
             self.state['p2'] = float(self.state['s2'])
             self.state['err'] = '0000'
         else:
-            states = {0:'okay', 1:'underrange', 2:'overrange', 3:'sensor error',
-                      4:'sensor off', 5:'no sensor', 6:'id error'}
-            
-            code, pr1 = self.cmd('PR1?').split(',')     # dewar
-            code = int(code)
-            self.state['status_1'] = states[code]
+            code, _, pr1 = self.cmd('PR1?').partition(',')     # dewar
+            self.state['status_1'] = STATES[int(code)]
             self.state['s1'] = pr1
-            self.state['p1'] = float(self.state['s1'])
+            self.state['p1'] = float(pr1)
 
-            code, pr2 = self.cmd('PR2?').split(',')     # pump station
-            code = int(code)
-            self.state['status_2'] = states[code]
+            code, _, pr2 = self.cmd('PR2?').partition(',')     # pump station
+            self.state['status_2'] = STATES[int(code)]
             self.state['s2'] = pr2
-            self.state['p2'] = float(self.state['s2'])
+            self.state['p2'] = float(pr2)
         
         self.state['number'] += 1
         self.publish(self.name, self.state)
@@ -153,14 +168,14 @@ class Pfeiffer(object):
     
     def reply(self):
         '''Read and return bytes reply from socket.'''
-        r = b''
-        while b'\r\n' not in r:
-            r += self.s.recv(64)
+        r = self.rfile.readline()
+        if not r:
+            raise ConnectionResetError('connection closed by Pfeiffer')
         return r.strip()
         
     
     def cmd(self, c):
-        '''Clear socket, send cmd c, and recv reply if "?" in c.'''
+        '''Send cmd c, and recv reply if "?" in c.'''
         self.log.debug('cmd(%s)', c)
         c = c.strip()
         if hasattr(c, 'encode'):
@@ -168,9 +183,33 @@ class Pfeiffer(object):
         query = b'?' in c
         c = c.replace(b'?', b'')
         
-        # clear socket buffer and send cmd
-        while select.select([self.s],[],[],0.0)[0]:
-            self.s.recv(64)
+        # not connected, e.g. an earlier initialise() failed to connect
+        if self.rfile.closed:
+            self.connect()
+        
+        # a timeout leaves rfile unreadable, so retry once after reconnecting
+        try:
+            return self.transact(c, query)
+        except (OSError, socket.timeout) as e:
+            self.log.debug('reconnecting after error: %s', e)
+            self.connect()
+            return self.transact(c, query)
+        # Pfeiffer.cmd
+    
+    
+    def transact(self, c, query):
+        '''Send bytes cmd c on the open socket and handle ACK/NAK;
+           if query, also request and return the str value.'''
+        # clear out any late or stray reply left in the socket and read
+        # buffer, so it can't be taken as this command's ACK or value.
+        self.s.settimeout(0.0)
+        try:
+            while self.rfile.read1(4096):
+                pass
+        finally:
+            self.s.settimeout(self.timeout)
+        
+        # send cmd
         self.s.sendall(c + b'\r\n')  # \n optional in cmds
         
         # get ack/nak
@@ -193,5 +232,5 @@ class Pfeiffer(object):
             r = self.reply()
             return r.decode()
         
-        # Pfeiffer.cmd
+        # Pfeiffer.transact
         
\ No newline at end of file
@@ -23,6 +23,7 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import sys
 import os
 import logging
+import math
 import time
 import namakanui.ini
 
@@ -133,15 +134,12 @@ def parse_range(s, maxlen=0, maxstep=0):
     alen = int(round(diff/step + 1))
     if maxlen and alen > maxlen:
         raise ValueError('step %g too small, array len %d > maxlen %d'%(step,alen,maxlen))
-    arr = []
-    val = first
-    while (step > 0 and val < last) or (step < 0 and val > last):
-        arr.append(val)
-        val += step
-    if abs(arr[-1] - last) < abs(step)*1e-6:
-        arr[-1] = last
-    else:
-        arr.append(last)
+    # compute each value from its index instead of accumulating step,
+    # which drifts over long ranges.  values within step*1e-6 of last
+    # are replaced by last itself.
+    n = int(math.ceil(diff/step - 1e-6))
+    arr = [first + i*step for i in range(n)]
+    arr.append(last)
     return arr
     # parse_range
 
@@ -25,6 +25,10 @@ import jac_sw
 import drama
 import drama.retry
 
+# bound once for the many button callbacks below
+_obey = drama.blind_obey
+_kick = drama.blind_kick
+
 from tkinter import ttk  # for Notebook (tabbed interface)
 import tkinter as tk
 from tkinter.scrolledtext import ScrolledText
@@ -32,6 +36,7 @@ from tkinter.scrolledtext import ScrolledText
 import sys
 import os
 import time
+import itertools
 taskname = 'NGUI_%d'%(os.getpid())
 
 # TODO add some way to change debug levels
@@ -106,6 +111,10 @@ class SetMixin(object):
         super().__init__(*args, **kwargs)
         # for now, assume state won't change to save time in set()
         self.bg_key = state_bg_key[self['state']]
+        # last text and color sent to Tk; most monitor values don't change
+        # from one update to the next, so skip the redundant Tcl calls.
+        self.last_value = None
+        self.last_bg = None
     
     def set(self, value, okay=None):
         '''
@@ -114,13 +123,17 @@ class SetMixin(object):
             widget.set('0x%x'%(state['simulate']), not state['simulate'])
             widget.set('%.2f'%(state['temperature']), 10.0 <= state['temperature'] <= 30.0)
         '''
-        self.textvariable.set(value)
+        if value != self.last_value:
+            self.textvariable.set(value)
+            self.last_value = value
         if okay is not None:
-            self[self.bg_key] = bg_values[int(bool(okay))]
+            self.bg(bg_values[int(bool(okay))])
     
     def bg(self, color):
         '''Set background color for assumed state.'''
-        self[self.bg_key] = color
+        if color != self.last_bg:
+            self[self.bg_key] = color
+            self.last_bg = color
         
 
 class SetLabel(SetMixin, tk.Label):
@@ -138,16 +151,44 @@ def grid_value(parent, row, column, sticky='', label=False, width=8):
     
     tk.Label widgets can't be selected for copying/pasting,
     so by default we use a 'readonly' Entry widget instead.
+    These are display-only, so leave them out of keyboard focus traversal;
+    they can still be selected with the mouse.
     '''
     if label:
         widget = SetLabel(parent)
         widget.grid(row=row, column=column, sticky=sticky)
     else:
-        widget = SetEntry(parent, width=width, justify='right', state='readonly')
+        widget = SetEntry(parent, width=width, justify='right', state='readonly', takefocus=0)
         widget.grid(row=row, column=column, sticky='nsew')#sticky=sticky)
     return widget
 
 
+def plain_value(v):
+    '''
+    Return v with any numpy array or scalar converted to python
+    list/scalar, so that v != prev gives a single bool.
+    '''
+    if hasattr(v, 'tolist'):
+        return v.tolist()
+    return v
+
+
+def grid_static_labels(parent, labels):
+    '''
+    Create fixed text labels in parent's grid using a single Tcl eval,
+    given a list of (text, row, column, sticky) tuples.
+    These labels are never updated, so no Python widget objects are made.
+    '''
+    script = []
+    for text,row,column,sticky in labels:
+        w = '%s.static%d'%(parent._w, next(_static_label_count))
+        script.append('label %s -text %s'%(w, tk._stringify(text)))
+        script.append('grid %s -row %d -column %d -sticky %s'%(w, row, column, sticky))
+    parent.tk.eval('\n'.join(script))
+
+_static_label_count = itertools.count()
+
+
 def grid_label(parent, text, row, width=8, label=False):
     '''
     Set up a [text: value] row and return the textvariable.
@@ -295,24 +336,28 @@ class LoadFrame(tk.Frame):
         move_frame = tk.Frame(cmd_frame)
         move_frame.pack(fill='x')
         self.combo = ttk.Combobox(move_frame, width=8)
+        self.combo_values = None
         self.combo.pack(side='left')
         self.move_button = tk.Button(move_frame, text='MOVE')
         self.move_button.pack(side='right')
+        # buttons obey our own task's actions rather than calling NAMAKANUI
+        # directly: the App action disables the buttons, waits for completion,
+        # and logs NAMAKANUI's messages and errors to the MESSAGES window.
         def move_callback():
-            drama.blind_obey(taskname, "LOAD_MOVE", position=self.combo.get())
+            _obey(taskname, "LOAD_MOVE", position=self.combo.get())
         self.move_button['command'] = move_callback
         home_frame = tk.Frame(cmd_frame)
         home_frame.pack(fill='x')
         self.home_button = tk.Button(home_frame, text='HOME')
         self.home_button.pack(side='left')
         def home_callback():
-            drama.blind_obey(taskname, "LOAD_HOME")
+            _obey(taskname, "LOAD_HOME")
         self.home_button['command'] = home_callback
         kick_button = tk.Button(home_frame, text='KICK')
         kick_button.pack(side='right')
         def kick_callback():
-            drama.blind_kick(namakanui_taskname, "LOAD_HOME")
-            drama.blind_kick(namakanui_taskname, "LOAD_MOVE")
+            _kick(namakanui_taskname, "LOAD_HOME")
+            _kick(namakanui_taskname, "LOAD_MOVE")
         kick_button['command'] = kick_callback
         # LoadFrame.setup
         
@@ -331,8 +376,12 @@ class LoadFrame(tk.Frame):
         self.v_homed.set('%d'%(state['homed']), state['homed'])
     
     def table_changed(self, state):
-        # update the position select combo box
-        self.combo['values'] = list(state.keys())
+        # update the position select combo box, but only if the positions
+        # changed, since setting values rebuilds the dropdown list.
+        values = tuple(sorted(state))
+        if values != self.combo_values:
+            self.combo['values'] = values
+            self.combo_values = values
         
     # LoadFrame
 
@@ -370,7 +419,7 @@ class ReferenceFrame(tk.Frame):
         self.dbm_button = tk.Button(dh_frame, text='DBM')
         self.dbm_button.grid(row=0, column=2)
         def dbm_callback():
-            drama.blind_obey(taskname, "SET_SG_DBM", float(dbm_entry.get()))
+            _obey(taskname, "SET_SG_DBM", dbm=float(dbm_entry.get()))
         self.dbm_button['command'] = dbm_callback
         #tk.Label(dh_frame, text='Hz: ').grid(row=1, column=0, sticky='w')
         hz_entry = tk.Entry(dh_frame, width=13, bg='white')
@@ -378,7 +427,7 @@ class ReferenceFrame(tk.Frame):
         self.hz_button = tk.Button(dh_frame, text='HZ')
         self.hz_button.grid(row=1, column=2, sticky='nsew')
         def hz_callback():
-            drama.blind_obey(taskname, "SET_SG_HZ", float(hz_entry.get()))
+            _obey(taskname, "SET_SG_HZ", hz=float(hz_entry.get()))
         self.hz_button['command'] = hz_callback
         dh_frame.grid_columnconfigure(0, weight=1)
         dh_frame.grid_columnconfigure(1, weight=1)
@@ -393,9 +442,9 @@ class ReferenceFrame(tk.Frame):
         self.off_button = tk.Button(out_frame, text='OFF')
         self.off_button.pack(side='right')
         def on_callback():
-            drama.blind_obey(taskname, "SET_SG_OUT", 1)
+            _obey(taskname, "SET_SG_OUT", out=1)
         def off_callback():
-            drama.blind_obey(taskname, "SET_SG_OUT", 0)
+            _obey(taskname, "SET_SG_OUT", out=0)
         self.on_button['command'] = on_callback
         self.off_button['command'] = off_callback
         # ReferenceFrame.setup
@@ -438,7 +487,7 @@ class PhotonicsFrame(tk.Frame):
         att_entry = tk.Entry(cmd_frame, width=13, bg='white')
         att_entry.pack(side='right')
         def att_callback():
-            drama.blind_obey(taskname, "SET_ATT", att=int(att_entry.get()))
+            _obey(taskname, "SET_ATT", att=int(att_entry.get()))
         self.att_button = tk.Button(cmd_frame, text='ATT')
         self.att_button.pack(side='left')
         self.att_button['command'] = att_callback
@@ -499,11 +548,11 @@ class STSRFrame(tk.Frame):
         cmd_frame.pack(side='right')
         tk.Label(cmd_frame, text='Band: ').pack(side='left')
         def b3_callback():
-            drama.blind_obey(taskname, "SET_BAND", 3)
+            _obey(taskname, "SET_BAND", band=3)
         def b6_callback():
-            drama.blind_obey(taskname, "SET_BAND", 6)
+            _obey(taskname, "SET_BAND", band=6)
         def b7_callback():
-            drama.blind_obey(taskname, "SET_BAND", 7)
+            _obey(taskname, "SET_BAND", band=7)
         self.b3_button = tk.Button(cmd_frame, text='3', command=b3_callback)
         self.b6_button = tk.Button(cmd_frame, text='6', command=b6_callback)
         self.b7_button = tk.Button(cmd_frame, text='7', command=b7_callback)
@@ -561,6 +610,10 @@ class BandFrame(tk.Frame):
         elif self.band == 7:
             self.tnames = ['4k', '110k', 'p0', 'spare', '15k', 'p1']
             self.tokay = [(0,5), (70,115), (0,5.5), (-2,2), (5,30), (0,5.5)]
+        # only the selected notebook tab is drawn; the others just keep
+        # the latest state until they are shown again.  see set_visible.
+        self.visible = True
+        self.hidden_state = None
         self.setup()
     
     def setup(self):
@@ -605,9 +658,9 @@ class BandFrame(tk.Frame):
         self.power_on_button.pack(side='left')
         self.power_off_button.pack(side='left')
         def power_on_callback():
-            drama.blind_obey(taskname, "POWER", band=self.band, enable=1)
+            _obey(taskname, "POWER", band=self.band, enable=1)
         def power_off_callback():
-            drama.blind_obey(taskname, "POWER", band=self.band, enable=0)
+            _obey(taskname, "POWER", band=self.band, enable=0)
         self.power_on_button['command'] = power_on_callback
         self.power_off_button['command'] = power_off_callback
         self.power_action = False  # true if POWER action is active
@@ -615,12 +668,14 @@ class BandFrame(tk.Frame):
         
         # PA
         pa_frame = tk.LabelFrame(c0, text='PA')
-        tk.Label(pa_frame, text='P0').grid(row=0, column=1, sticky='e')
-        tk.Label(pa_frame, text='P1').grid(row=0, column=2, sticky='e')
-        tk.Label(pa_frame, text='Vs').grid(row=1, column=0, sticky='e')
-        tk.Label(pa_frame, text='Vd').grid(row=2, column=0, sticky='e')
-        tk.Label(pa_frame, text='Id').grid(row=3, column=0, sticky='e')
-        tk.Label(pa_frame, text='Vg').grid(row=4, column=0, sticky='ne')
+        grid_static_labels(pa_frame, [
+            ('P0', 0, 1, 'e'),
+            ('P1', 0, 2, 'e'),
+            ('Vs', 1, 0, 'e'),
+            ('Vd', 2, 0, 'e'),
+            ('Id', 3, 0, 'e'),
+            ('Vg', 4, 0, 'ne'),
+            ])
         self.v_pa_drain_s = []
         self.v_pa_drain_v = []
         self.v_pa_drain_c = []
@@ -638,22 +693,24 @@ class BandFrame(tk.Frame):
         # AMC, presented in a table with friendlier labels.
         # might save a little space by putting 5v in the LabelFrame.
         amc_frame = tk.LabelFrame(c0, text='AMC')
-        tk.Label(amc_frame, text='Vd').grid(row=0, column=1, sticky='e')
-        tk.Label(amc_frame, text='Id').grid(row=0, column=2, sticky='e')  # can they all be NE?
-        tk.Label(amc_frame, text='Vg').grid(row=0, column=3, sticky='e')
-        tk.Label(amc_frame, text='A').grid(row=1, column=0, sticky='e')
+        grid_static_labels(amc_frame, [
+            ('Vd', 0, 1, 'e'),
+            ('Id', 0, 2, 'e'),  # can they all be NE?
+            ('Vg', 0, 3, 'e'),
+            ('A', 1, 0, 'e'),
+            ('B', 2, 0, 'e'),
+            ('E', 3, 0, 'e'),
+            ('D', 4, 0, 'ne'),
+            ])
         self.v_amc_drain_a_v = grid_value(amc_frame, 1, 1, 'e')
         self.v_amc_drain_a_c = grid_value(amc_frame, 1, 2, 'e')
         self.v_amc_gate_a_v = grid_value(amc_frame, 1, 3, 'e')
-        tk.Label(amc_frame, text='B').grid(row=2, column=0, sticky='e')
         self.v_amc_drain_b_v = grid_value(amc_frame, 2, 1, 'e')
         self.v_amc_drain_b_c = grid_value(amc_frame, 2, 2, 'e')
         self.v_amc_gate_b_v = grid_value(amc_frame, 2, 3, 'e')
-        tk.Label(amc_frame, text='E').grid(row=3, column=0, sticky='e')
         self.v_amc_drain_e_v = grid_value(amc_frame, 3, 1, 'e')
         self.v_amc_drain_e_c = grid_value(amc_frame, 3, 2, 'e')
         self.v_amc_gate_e_v = grid_value(amc_frame, 3, 3, 'e')
-        tk.Label(amc_frame, text='D').grid(row=4, column=0, sticky='ne')
         self.v_amc_mult_d_v = grid_value(amc_frame, 4, 1, 'ne')
         self.v_amc_mult_d_c = grid_value(amc_frame, 4, 2, 'ne')
         amc_frame.grid_columnconfigure(0, weight=1)
@@ -696,48 +753,41 @@ class BandFrame(tk.Frame):
         self.lock_sb_switch_button = tk.Button(lock_sb_button, text='Switch Lock SB')
         self.lock_sb_switch_button.pack(side='right')
         def lock_sb_switch_callback():
-            drama.blind_obey(taskname, "LOCK_SB_SWITCH", band=self.band)
+            _obey(taskname, "LOCK_SB_SWITCH", band=self.band)
         self.lock_sb_switch_button['command'] = lock_sb_switch_callback
         
         # LNA.  TODO band 3/6 only have a single stage.
         # config file order is Vd, Id, Vg.
         lna_frame = tk.LabelFrame(c2, text='LNA')
-        tk.Label(lna_frame, text='P0/S1').grid(row=0, column=1, sticky='e')
-        tk.Label(lna_frame, text='P0/S2').grid(row=0, column=2, sticky='e')
-        tk.Label(lna_frame, text='P1/S1').grid(row=0, column=3, sticky='e')
-        tk.Label(lna_frame, text='P1/S2').grid(row=0, column=4, sticky='e')
-        tk.Label(lna_frame, text='Enable').grid(row=1, column=0, sticky='e')
-        tk.Label(lna_frame, text='Vd0').grid(row=2, column=0, sticky='e')
-        tk.Label(lna_frame, text='Vd1').grid(row=3, column=0, sticky='e')
-        tk.Label(lna_frame, text='Vd2').grid(row=4, column=0, sticky='e')
-        tk.Label(lna_frame, text='Id0').grid(row=5, column=0, sticky='e')
-        tk.Label(lna_frame, text='Id1').grid(row=6, column=0, sticky='e')
-        tk.Label(lna_frame, text='Id2').grid(row=7, column=0, sticky='e')
-        tk.Label(lna_frame, text='Vg0').grid(row=8, column=0, sticky='e')
-        tk.Label(lna_frame, text='Vg1').grid(row=9, column=0, sticky='e')
-        tk.Label(lna_frame, text='Vg2').grid(row=10, column=0, sticky='ne')
-        # there's got to be a better way
+        grid_static_labels(lna_frame, [
+            ('P0/S1', 0, 1, 'e'),
+            ('P0/S2', 0, 2, 'e'),
+            ('P1/S1', 0, 3, 'e'),
+            ('P1/S2', 0, 4, 'e'),
+            ('Enable', 1, 0, 'e'),
+            ('Vd0', 2, 0, 'e'),
+            ('Vd1', 3, 0, 'e'),
+            ('Vd2', 4, 0, 'e'),
+            ('Id0', 5, 0, 'e'),
+            ('Id1', 6, 0, 'e'),
+            ('Id2', 7, 0, 'e'),
+            ('Vg0', 8, 0, 'e'),
+            ('Vg1', 9, 0, 'e'),
+            ('Vg2', 10, 0, 'ne'),
+            ])
+        # widget lists match the state array order, [p0s1 vd0, vd1, vd2, p0s2 vd0 ...]
         self.v_lna_enable = []
-        self.v_lna_vd0 = []
-        self.v_lna_vd1 = []
-        self.v_lna_vd2 = []
-        self.v_lna_id0 = []
-        self.v_lna_id1 = []
-        self.v_lna_id2 = []
-        self.v_lna_vg0 = []
-        self.v_lna_vg1 = []
-        self.v_lna_vg2 = []
+        self.v_lna_drain_v = []
+        self.v_lna_drain_c = []
+        self.v_lna_gate_v = []
         for i in range(4):
             self.v_lna_enable.append(grid_value(lna_frame, 1, i+1, 'e'))
-            self.v_lna_vd0.append(grid_value(lna_frame, 2, i+1, 'e'))
-            self.v_lna_vd1.append(grid_value(lna_frame, 3, i+1, 'e'))
-            self.v_lna_vd2.append(grid_value(lna_frame, 4, i+1, 'e'))
-            self.v_lna_id0.append(grid_value(lna_frame, 5, i+1, 'e'))
-            self.v_lna_id1.append(grid_value(lna_frame, 6, i+1, 'e'))
-            self.v_lna_id2.append(grid_value(lna_frame, 7, i+1, 'e'))
-            self.v_lna_vg0.append(grid_value(lna_frame, 8, i+1, 'e'))
-            self.v_lna_vg1.append(grid_value(lna_frame, 9, i+1, 'e'))
-            self.v_lna_vg2.append(grid_value(lna_frame, 10, i+1, 'ne'))
+            for j in range(3):
+                self.v_lna_drain_v.append(grid_value(lna_frame, 2+j, i+1, 'e'))
+            for j in range(3):
+                self.v_lna_drain_c.append(grid_value(lna_frame, 5+j, i+1, 'e'))
+            for j in range(3):
+                self.v_lna_gate_v.append(grid_value(lna_frame, 8+j, i+1, 'ne' if j==2 else 'e'))
         lna_frame.grid_columnconfigure(0, weight=1)
         lna_frame.grid_columnconfigure(1, weight=1)
         lna_frame.grid_columnconfigure(2, weight=1)
@@ -747,15 +797,17 @@ class BandFrame(tk.Frame):
         
         # SIS table.  TODO not for band 3
         sis_frame = tk.LabelFrame(c2, text='SIS')
-        tk.Label(sis_frame, text='P0/S1').grid(row=0, column=1, sticky='e')
-        tk.Label(sis_frame, text='P0/S2').grid(row=0, column=2, sticky='e')
-        tk.Label(sis_frame, text='P1/S1').grid(row=0, column=3, sticky='e')
-        tk.Label(sis_frame, text='P1/S2').grid(row=0, column=4, sticky='e')
-        tk.Label(sis_frame, text='open loop').grid(row=1, column=0, sticky='e')
-        tk.Label(sis_frame, text='mixer mV').grid(row=2, column=0, sticky='e')
-        tk.Label(sis_frame, text='mixer uA').grid(row=3, column=0, sticky='e')
-        tk.Label(sis_frame, text='magnet V').grid(row=4, column=0, sticky='e')
-        tk.Label(sis_frame, text='magnet mA').grid(row=5, column=0, sticky='ne')
+        grid_static_labels(sis_frame, [
+            ('P0/S1', 0, 1, 'e'),
+            ('P0/S2', 0, 2, 'e'),
+            ('P1/S1', 0, 3, 'e'),
+            ('P1/S2', 0, 4, 'e'),
+            ('open loop', 1, 0, 'e'),
+            ('mixer mV', 2, 0, 'e'),
+            ('mixer uA', 3, 0, 'e'),
+            ('magnet V', 4, 0, 'e'),
+            ('magnet mA', 5, 0, 'ne'),
+            ])
         self.v_sis_open_loop = []
         self.v_sis_v = []
         self.v_sis_c = []
@@ -782,7 +834,7 @@ class BandFrame(tk.Frame):
         tune_entry.pack(side='right')
         tk.Label(tune_frame, text='LO GHz: ').pack(side='right')
         def tune_callback():
-            drama.blind_obey(taskname, "TUNE", band=self.band, lo_ghz=float(tune_entry.get()), voltage=0.0)
+            _obey(taskname, "TUNE", band=self.band, lo_ghz=float(tune_entry.get()), voltage=0.0)
         self.tune_button['command'] = tune_callback
         
         # TODO: better arrangement?
@@ -799,67 +851,138 @@ class BandFrame(tk.Frame):
         sis_frame.pack(fill='x')
         tune_frame.pack(fill='both', expand=1)
         
+        self.v_fe_mode.set('---')
+        self.setup_updaters()
+        
         # BandFrame.setup
         
         
-    # TODO: maybe ignore 'okay' for all other fields if simulated.
-    def mon_changed(self, state):
-        self.connected['text'] = "YES"
-        self.connected['bg'] = 'green'
-        self.v_number.set('%d'%(state['number']))
-        self.v_simulate.set('0x%x'%(state['simulate']), state['simulate']==0)  # TODO tooltip, warning
-        # more or less alphabetical order
-        self.v_amc_5v.set('%.3f'%(state['amc_5v']), 4.0 < state['amc_5v'] < 6.0)  # TODO tighten up
+    def setup_updaters(self):
+        '''
+        Build the tables used by mon_changed to refresh only the widgets
+        whose values changed:
+            simple_updates: [(state_key, widget, fmt, okay_func or None)]
+            array_updates: [(state_key, [widgets], '\n'-joined fmts)]
+            updaters: {state_key: func(value)} for anything fancier
+        '''
+        # TODO: maybe ignore 'okay' for all other fields if simulated.
+        su = [
+            ('number', self.v_number, '%d', None),
+            ('simulate', self.v_simulate, '0x%x', lambda v: v==0),  # TODO tooltip, warning
+            # more or less alphabetical order
+            ('amc_5v', self.v_amc_5v, '%.3f', lambda v: 4.0 < v < 6.0),  # TODO tighten up
+            ]
         # TODO warnings for AMC values?
-        self.v_amc_drain_a_c.set('%.3f'%(state['amc_drain_a_c']))
-        self.v_amc_drain_a_v.set('%.3f'%(state['amc_drain_a_v']))
-        self.v_amc_drain_b_c.set('%.3f'%(state['amc_drain_b_c']))
-        self.v_amc_drain_b_v.set('%.3f'%(state['amc_drain_b_v']))
-        self.v_amc_drain_e_c.set('%.3f'%(state['amc_drain_e_c']))
-        self.v_amc_drain_e_v.set('%.3f'%(state['amc_drain_e_v']))
-        self.v_amc_gate_a_v.set('%.3f'%(state['amc_gate_a_v']))
-        self.v_amc_gate_b_v.set('%.3f'%(state['amc_gate_b_v']))
-        self.v_amc_gate_e_v.set('%.3f'%(state['amc_gate_e_v']))
-        self.v_amc_mult_d_c.set('%.3f'%(state['amc_mult_d_c']))
-        self.v_amc_mult_d_v.set('%.3f'%(state['amc_mult_d_v']))
-        
-        self.v_pll_temp.set('%.3f'%(state['pll_temp']+273.15), -20.0 < state['pll_temp'] < 45.0)
-        if 40 <= state['pll_temp'] < 45.0:
-            self.v_pll_temp.bg('yellow')
-        for i,v in enumerate(state['cart_temp']):
-            okay = self.tokay[i][0] < v < self.tokay[i][1]
-            self.v_cart_temp[i].set('%.3f'%(v), okay)
+        for k in ['amc_drain_a_c', 'amc_drain_a_v', 'amc_drain_b_c', 'amc_drain_b_v',
+                  'amc_drain_e_c', 'amc_drain_e_v', 'amc_gate_a_v', 'amc_gate_b_v',
+                  'amc_gate_e_v', 'amc_mult_d_c', 'amc_mult_d_v']:
+            su.append((k, getattr(self, 'v_'+k), '%.3f', None))
+        su += [
+            ('lo_ghz', self.v_lo_ghz, '%.9f', lambda v: 70 < v < 370),  # TODO band-specific
+            # TODO tighten these up
+            ('pa_3v', self.v_pa_3v, '%.3f', lambda v: 2 < abs(v) < 4),
+            ('pa_5v', self.v_pa_5v, '%.3f', lambda v: 4 < v < 6),
+            ('pd_enable', self.v_pd_enable, '%d', bool),
+            ('pll_lock_v', self.v_pll_lock_v, '%.3f', lambda v: 3 < v),
+            # for now we will always want correction voltage close to zero;
+            # this might change later if we do fancy frequency switching stuff.
+            ('pll_corr_v', self.v_pll_corr_v, '%.3f', lambda v: -5 < v < 5),
+            ('pll_if_power', self.v_pll_if_power, '%.3f', lambda v: -3.0 < v < -0.5),
+            ('pll_ref_power', self.v_pll_ref_power, '%.3f', lambda v: -3.0 < v < -0.5),
+            ('pll_loop_bw', self.v_pll_loop_bw, '%d', None),  # TODO warn?
+            ('pll_null_int', self.v_pll_null_int, '%d', lambda v: v==0),
+            ('pll_unlock', self.v_pll_unlock, '%d', lambda v: v==0),
+            # TODO what is the typical ping time in practice?
+            ('ppcomm_time', self.v_ppcomm_time, '%.6f', lambda v: 0 < v < 0.002),
+            ('yig_ghz', self.v_yig_ghz, '%.9f', lambda v: 11 < v < 22),
+            ('yig_heater_c', self.v_yig_heater_c, '%.3f', None),
+            ('yto_coarse', self.v_yto_coarse, '%d', None),
+            ]
+        self.simple_updates = su
+        
+        # TODO okay values for these?
+        # TODO warning?  at least pa_drain_v?
+        # TODO warnings, band-specific
+        au = [(k, getattr(self, 'v_'+k), '%.3f') for k in
+              ['lna_drain_v', 'lna_drain_c', 'lna_gate_v',
+               'pa_drain_s', 'pa_drain_v', 'pa_drain_c', 'pa_gate_v',
+               'sis_v', 'sis_mag_c', 'sis_mag_v']]
+        au.append(('sis_open_loop', self.v_sis_open_loop, '%d'))
+        # format a whole array with one % operation, then split it up
+        self.array_updates = [(k, w, '\n'.join([fmt]*len(w))) for k,w,fmt in au]
+        
+        def set_pll_temp(v):
+            self.v_pll_temp.set('%.3f'%(v+273.15), -20.0 < v < 45.0)
+            if 40 <= v < 45.0:
+                self.v_pll_temp.bg('yellow')
+        
+        def set_cart_temp(temps):
+            for i,v in enumerate(temps):
+                okay = self.tokay[i][0] < v < self.tokay[i][1]
+                self.v_cart_temp[i].set('%.3f'%(v), okay)
+        
+        def set_lna_enable(enables):
+            for w,e in zip(self.v_lna_enable, enables):  # p0s1 ... p1s2
+                w.set('%d'%(e), e)
+        
+        _lock_str = {0:'below', 1:'above'}
+        def set_pll_sb_lock(v):
+            self.v_pll_sb_lock.set(_lock_str[v])
+        
+        def set_sis_c(currents):
+            for w,c in zip(self.v_sis_c, currents):
+                w.set('%.3f'%(c*1e3))  # mA to uA
         
         # TODO need a way to set this, and it really should default to 0 for cold system.
-        self.v_fe_mode.set('---')#'%d'%(state['fe_mode']))  # TODO monitor FEMC state
-        
-        for i in range(4):  # p0s1 ... p1s2
-            self.v_lna_enable[i].set('%d'%(state['lna_enable'][i]), state['lna_enable'][i])
-            # TODO okay values for these?
-            self.v_lna_vd0[i].set('%.3f'%(state['lna_drain_v'][i*3+0]))
-            self.v_lna_vd1[i].set('%.3f'%(state['lna_drain_v'][i*3+1]))
-            self.v_lna_vd2[i].set('%.3f'%(state['lna_drain_v'][i*3+2]))
-            self.v_lna_id0[i].set('%.3f'%(state['lna_drain_c'][i*3+0]))
-            self.v_lna_id1[i].set('%.3f'%(state['lna_drain_c'][i*3+1]))
-            self.v_lna_id2[i].set('%.3f'%(state['lna_drain_c'][i*3+2]))
-            self.v_lna_vg0[i].set('%.3f'%(state['lna_gate_v'][i*3+0]))
-            self.v_lna_vg1[i].set('%.3f'%(state['lna_gate_v'][i*3+1]))
-            self.v_lna_vg2[i].set('%.3f'%(state['lna_gate_v'][i*3+2]))
-        
-        self.v_lo_ghz.set('%.9f'%(state['lo_ghz']), 70 < state['lo_ghz'] < 370)  # TODO band-specific
-        
-        # TODO tighten these up
-        self.v_pa_3v.set('%.3f'%(state['pa_3v']), 2 < abs(state['pa_3v']) < 4)
-        self.v_pa_5v.set('%.3f'%(state['pa_5v']), 4 < state['pa_5v'] < 6)
+        # TODO monitor FEMC state; for now fe_mode just shows '---'.
         
-        # TODO warning?  at least pa_drain_v?
-        for i in range(2):
-            self.v_pa_drain_s[i].set('%.3f'%(state['pa_drain_s'][i]))
-            self.v_pa_drain_v[i].set('%.3f'%(state['pa_drain_v'][i]))
-            self.v_pa_drain_c[i].set('%.3f'%(state['pa_drain_c'][i]))
-            self.v_pa_gate_v[i].set('%.3f'%(state['pa_gate_v'][i]))
+        self.updaters = {'pll_temp':set_pll_temp, 'cart_temp':set_cart_temp,
+                         'lna_enable':set_lna_enable, 'pll_sb_lock':set_pll_sb_lock,
+                         'sis_c':set_sis_c}
+        self.prev_state = {}
+        # BandFrame.setup_updaters
+    
+    def set_visible(self, visible):
+        '''Called when notebook tab changes; show any state held while hidden.'''
+        self.visible = visible
+        if visible and self.hidden_state is not None:
+            state = self.hidden_state
+            self.hidden_state = None
+            self.mon_changed(state)
+    
+    def mon_changed(self, state):
+        if not self.visible:
+            self.hidden_state = state
+            return
         
-        self.v_pd_enable.set('%d'%(state['pd_enable']), state['pd_enable'])
+        self.connected['text'] = "YES"
+        self.connected['bg'] = 'green'
+        
+        # most values are static between updates; skip the ones that
+        # match the previous state.  arrays may arrive as numpy ndarrays,
+        # where != is elementwise and has no truth value, so compare
+        # them as plain lists instead.
+        # bind lookups once; this runs for ~50 keys per band per update.
+        state = {k:plain_value(v) for k,v in state.items()}
+        g = state.__getitem__
+        pg = self.prev_state.get
+        for k,w,fmt,okay in self.simple_updates:
+            v = g(k)
+            if v != pg(k):
+                w.set(fmt%(v), okay and okay(v))
+        for k,widgets,fmt in self.array_updates:
+            values = g(k)
+            if values != pg(k):
+                for w,s in zip(widgets, (fmt%tuple(values)).split('\n')):
+                    w.set(s)
+        for k,func in self.updaters.items():
+            v = g(k)
+            if v != pg(k):
+                func(v)
+        self.prev_state = state
+        
+        # buttons are disabled during a POWER action and reenabled here,
+        # so always check them even if pd_enable hasn't changed.
         if not self.power_action:
             if state['pd_enable']:
                 self.power_on_button['state'] = 'disabled'
@@ -868,34 +991,6 @@ class BandFrame(tk.Frame):
                 self.power_on_button['state'] = 'normal'
                 self.power_off_button['state'] = 'disabled'
         
-        self.v_pll_lock_v.set('%.3f'%(state['pll_lock_v']), 3 < state['pll_lock_v'])
-        # for now we will always want correction voltage close to zero;
-        # this might change later if we do fancy frequency switching stuff.
-        self.v_pll_corr_v.set('%.3f'%(state['pll_corr_v']), -5 < state['pll_corr_v'] < 5)
-        self.v_pll_if_power.set('%.3f'%(state['pll_if_power']), -3.0 < state['pll_if_power'] < -0.5)
-        self.v_pll_ref_power.set('%.3f'%(state['pll_ref_power']), -3.0 < state['pll_ref_power'] < -0.5)
-        
-        self.v_pll_loop_bw.set('%d'%(state['pll_loop_bw']))  # TODO warn?
-        self.v_pll_null_int.set('%d'%(state['pll_null_int']), state['pll_null_int']==0)
-        _lock_str = {0:'below', 1:'above'}[state['pll_sb_lock']]
-        self.v_pll_sb_lock.set('%s'%(_lock_str))
-        self.v_pll_unlock.set('%d'%(state['pll_unlock']), state['pll_unlock']==0)
-        
-        # TODO what is the typical ping time in practice?
-        self.v_ppcomm_time.set('%.6f'%(state['ppcomm_time']), 0 < state['ppcomm_time'] < 0.002)
-        
-        for i in range(4):
-            # TODO warnings, band-specific
-            self.v_sis_open_loop[i].set('%d'%(state['sis_open_loop'][i]))
-            self.v_sis_c[i].set('%.3f'%(state['sis_c'][i]*1e3))  # mA to uA
-            self.v_sis_v[i].set('%.3f'%(state['sis_v'][i]))
-            self.v_sis_mag_c[i].set('%.3f'%(state['sis_mag_c'][i]))
-            self.v_sis_mag_v[i].set('%.3f'%(state['sis_mag_v'][i]))
-        
-        self.v_yig_ghz.set('%.9f'%(state['yig_ghz']), 11 < state['yig_ghz'] < 22)
-        self.v_yig_heater_c.set('%.3f'%(state['yig_heater_c']))
-        self.v_yto_coarse.set('%d'%(state['yto_coarse']))
-        
         # BandFrame.mon_changed
  
     # BandFrame
@@ -913,12 +1008,6 @@ class App(tk.Frame):
         self.msg_handler.setFormatter(msg_formatter)
         logging.root.addHandler(self.msg_handler)
         
-        self.actions = [self.MON_MAIN, self.MON_B3, self.MON_B6, self.MON_B7,
-                        self.POWER, self.LOCK_SB_SWITCH, self.TUNE, self.LOAD_MOVE, self.LOAD_HOME,
-                        self.SET_SG_DBM, self.SET_SG_HZ, self.SET_SG_OUT,
-                        self.SET_ATT,
-                        self.SET_BAND, self.MSG_TEST]
-        
         self.retry_load = drama.retry.RetryMonitor(namakanui_taskname, 'LOAD')
         self.retry_load_table = drama.retry.RetryMonitor(namakanui_taskname, 'LOAD_TABLE')
         self.retry_reference = drama.retry.RetryMonitor(namakanui_taskname, 'REFERENCE')
@@ -931,6 +1020,56 @@ class App(tk.Frame):
         self.retry_b6 = drama.retry.RetryMonitor(namakanui_taskname, 'BAND6')
         self.retry_b7 = drama.retry.RetryMonitor(namakanui_taskname, 'BAND7')
         
+        # each cartridge still needs its own monitor action, since RetryMonitors
+        # sharing an action could miss each other's RESCHED timeouts.
+        self.MON_B3 = self.make_mon_cart(3)
+        self.MON_B6 = self.make_mon_cart(6)
+        self.MON_B7 = self.make_mon_cart(7)
+        
+        self.band_frames = {3:self.b3_frame, 6:self.b6_frame, 7:self.b7_frame}
+        
+        # fast-path argument keys for actions we obey from our own buttons,
+        # {action_name: (keys, args_func)}; see adapt_args.
+        # make_forward_action adds the entries for forwarded actions.
+        self.arg_adapters = {
+            'POWER': (('band', 'enable'), self.power_args),
+            }
+        
+        # actions that pass their arguments straight on to the namakanui
+        # task action of the same name, disabling some buttons meanwhile:
+        # (name, keys, args_func, buttons_func, timeout)
+        load_buttons = lambda *args: [self.load_frame.move_button, self.load_frame.home_button]
+        stsr_buttons = lambda *args: [self.stsr_frame.b3_button, self.stsr_frame.b6_button, self.stsr_frame.b7_button]
+        forward_table = [
+            ('LOCK_SB_SWITCH', ('band',), self.lock_sb_switch_args,
+                lambda band: [self.band_frames[band].lock_sb_switch_button], 10),
+            ('TUNE', ('band', 'lo_ghz', 'voltage'), self.tune_args,
+                lambda band, lo_ghz, voltage: [self.band_frames[band].tune_button], 30),
+            ('LOAD_MOVE', ('position',), self.move_args, load_buttons, 30),
+            ('LOAD_HOME', (), None, load_buttons, 30),
+            ('SET_SG_DBM', ('dbm',), self.dbm_args,
+                lambda dbm: [self.reference_frame.dbm_button], 5),
+            ('SET_SG_HZ', ('hz',), self.hz_args,
+                lambda hz: [self.reference_frame.hz_button], 5),
+            ('SET_SG_OUT', ('out',), self.out_args,
+                lambda out: [self.reference_frame.on_button, self.reference_frame.off_button], 5),
+            ('SET_ATT', ('att',), self.att_args,
+                lambda att: [self.photonics_frame.att_button], 5),
+            ('SET_BAND', ('band',), self.band_args, stsr_buttons, 5),
+            ]
+        for name, keys, args_func, buttons_func, timeout in forward_table:
+            setattr(self, name, self.make_forward_action(name, keys, args_func, buttons_func, timeout))
+        
+        self.actions = [self.MON_MAIN, self.MON_B3, self.MON_B6, self.MON_B7,
+                        self.POWER, self.LOCK_SB_SWITCH, self.TUNE, self.LOAD_MOVE, self.LOAD_HOME,
+                        self.SET_SG_DBM, self.SET_SG_HZ, self.SET_SG_OUT,
+                        self.SET_ATT,
+                        self.SET_BAND, self.MSG_TEST]
+        
+        # monitor updates waiting for the next idle callback, {func: state}
+        self.pending = {}
+        self.pending_id = None
+        
         # App.__init__
     
     #def __del__(self):
@@ -1016,8 +1155,10 @@ class App(tk.Frame):
                 pass
             # defocus by focusing on something else
             self.master.focus()
+            self.show_selected_tab()
         
         self.notebook.bind("<<NotebookTabChanged>>", handle_tab_changed)
+        self.show_selected_tab()
         
         tk.Label(task_frame, text=' ').pack(side='left')  # spacer
         
@@ -1031,14 +1172,58 @@ class App(tk.Frame):
         # App.setup
         
     
+    def show_selected_tab(self):
+        '''Let each BandFrame know whether it is the selected notebook tab.'''
+        selected = self.notebook.nametowidget(self.notebook.select())
+        for frame in [self.b3_frame, self.b6_frame, self.b7_frame]:
+            frame.set_visible(frame is selected)
+    
+    def queue_update(self, func, state):
+        '''
+        Schedule func(state) for the next Tk idle callback.
+        Monitor messages often arrive in bursts; this way all the widget
+        updates from a burst are drawn together, and if the same monitor
+        changes twice before we get around to it, only the latest state is used.
+        '''
+        self.pending[func] = state
+        if self.pending_id is None:
+            self.pending_id = self.after_idle(self.flush_pending)
+    
+    def flush_pending(self):
+        '''Apply queued monitor updates; see queue_update.'''
+        pending = self.pending
+        self.pending = {}
+        self.pending_id = None
+        for func,state in pending.items():
+            try:
+                func(state)
+            except:
+                log.exception('exception updating %s', func.__qualname__)
+    
+    def set_disconnected(self, frame):
+        '''Show frame as disconnected, dropping any queued update.'''
+        self.pending.pop(frame.mon_changed, None)
+        if isinstance(frame.connected, SetMixin):
+            # go through set() so its cache knows to restore green later
+            frame.connected.set("NO", False)
+        else:
+            frame.connected['text'] = "NO"
+            frame.connected['bg'] = 'red'
+    
     def start_monitors(self):
-        drama.blind_obey(taskname, 'MON_MAIN')
-        drama.blind_obey(taskname, 'MON_B3')
-        drama.blind_obey(taskname, 'MON_B6')
-        drama.blind_obey(taskname, 'MON_B7')
+        _obey(taskname, 'MON_MAIN')
+        _obey(taskname, 'MON_B3')
+        _obey(taskname, 'MON_B6')
+        _obey(taskname, 'MON_B7')
     
     def MON_MAIN(self, msg):
-        '''Calls handle() on all NAMAKANUI RetryMonitors.'''
+        '''
+        Calls handle() on all NAMAKANUI RetryMonitors.
+        
+        Monitor updates are pushed by DRAMA as TRIGGER messages, so they are
+        handled as soon as they arrive; the reschedule at the end is only a
+        timeout used to notice a stopped UPDATE_HW and retry connections.
+        '''
         
         log.debug('MON_MAIN msg: %s', msg)
         
@@ -1058,51 +1243,44 @@ class App(tk.Frame):
                 pass  # for other errors, handle() as usual
         
         if updating and self.retry_vacuum.handle(msg):
-            self.vacuum_frame.mon_changed(msg.arg)
+            self.queue_update(self.vacuum_frame.mon_changed, msg.arg)
         
         if updating and self.retry_compressor.handle(msg):
-            self.compressor_frame.mon_changed(msg.arg)
+            self.queue_update(self.compressor_frame.mon_changed, msg.arg)
         
         if updating and self.retry_lakeshore.handle(msg):
-            self.lakeshore_frame.mon_changed(msg.arg)
+            self.queue_update(self.lakeshore_frame.mon_changed, msg.arg)
         
         if updating and self.retry_load.handle(msg):
-            self.load_frame.mon_changed(msg.arg)
+            self.queue_update(self.load_frame.mon_changed, msg.arg)
         
         if updating and self.retry_load_table.handle(msg):
-            self.load_frame.table_changed(msg.arg)
+            self.queue_update(self.load_frame.table_changed, msg.arg)
         
         if updating and self.retry_reference.handle(msg):
-            self.reference_frame.mon_changed(msg.arg)
+            self.queue_update(self.reference_frame.mon_changed, msg.arg)
         
         if updating and self.retry_photonics.handle(msg):
-            self.photonics_frame.mon_changed(msg.arg)
+            self.queue_update(self.photonics_frame.mon_changed, msg.arg)
         
         if updating and self.retry_stsr.handle(msg):
-            self.stsr_frame.mon_changed(msg.arg)
+            self.queue_update(self.stsr_frame.mon_changed, msg.arg)
             
         # set disconnected indicators on all frames
         if not updating or not self.retry_vacuum.connected:
-            self.vacuum_frame.connected['text'] = "NO"
-            self.vacuum_frame.connected['bg'] = 'red'
+            self.set_disconnected(self.vacuum_frame)
         if not updating or not self.retry_compressor.connected:
-            self.compressor_frame.connected['text'] = "NO"
-            self.compressor_frame.connected['bg'] = 'red'
+            self.set_disconnected(self.compressor_frame)
         if not updating or not self.retry_lakeshore.connected:
-            self.lakeshore_frame.connected['text'] = "NO"
-            self.lakeshore_frame.connected['bg'] = 'red'
+            self.set_disconnected(self.lakeshore_frame)
         if not updating or not self.retry_load.connected:
-            self.load_frame.connected['text'] = "NO"
-            self.load_frame.connected['bg'] = 'red'
+            self.set_disconnected(self.load_frame)
         if not updating or not self.retry_reference.connected:
-            self.reference_frame.connected['text'] = "NO"
-            self.reference_frame.connected['bg'] = 'red'
+            self.set_disconnected(self.reference_frame)
         if not updating or not self.retry_photonics.connected:
-            self.photonics_frame.connected['text'] = "NO"
-            self.photonics_frame.connected['bg'] = 'red'
+            self.set_disconnected(self.photonics_frame)
         if not updating or not self.retry_stsr.connected:
-            self.stsr_frame.connected['text'] = "NO"
-            self.stsr_frame.connected['bg'] = 'red'
+            self.set_disconnected(self.stsr_frame)
         
         drama.reschedule(10.0)
         
@@ -1123,20 +1301,24 @@ class App(tk.Frame):
                 log.error('%s: %s not active, status: %r', caller, retry.task+'.UPDATE_CARTS', e)
                 pass  # for other errors, handle() as usual
         if updating and retry.handle(msg):
-            frame.mon_changed(msg.arg)
+            self.queue_update(frame.mon_changed, msg.arg)
         if not updating or not retry.connected:
-            frame.connected['text'] = "NO"
-            frame.connected['bg'] = 'red'
+            self.set_disconnected(frame)
+            frame.hidden_state = None
         drama.reschedule(10.0)
     
-    def MON_B3(self, msg):
-        self.mon_cart(msg, self.retry_b3, self.b3_frame, 'MON_B3')
-    
-    def MON_B6(self, msg):
-        self.mon_cart(msg, self.retry_b6, self.b6_frame, 'MON_B6')
-    
-    def MON_B7(self, msg):
-        self.mon_cart(msg, self.retry_b7, self.b7_frame, 'MON_B7')
+    def make_mon_cart(self, band):
+        '''Return a MON_B<band> action that calls mon_cart for the given band.'''
+        retry = getattr(self, 'retry_b%d'%(band))
+        frame = getattr(self, 'b%d_frame'%(band))
+        caller = 'MON_B%d'%(band)
+        mon_cart = self.mon_cart
+        def MON_B(msg):
+            mon_cart(msg, retry, frame, caller)
+        # DRAMA uses the function name as the action name
+        MON_B.__name__ = caller
+        MON_B.__qualname__ = 'App.' + caller
+        return MON_B
         
     
     def check_msg(self, msg, name):
@@ -1176,13 +1358,31 @@ class App(tk.Frame):
         while(self.check_msg(transid.wait(wall_timeout-time.time()), name)):
             pass
     
+    def adapt_args(self, name, arg):
+        '''
+        Return self.arg_adapters[name] args_func applied to msg.arg.
+        Our own blind_obey calls always send exactly the expected keywords,
+        so pull them straight from the arg dict; anything else (positional
+        args from ditscmd, other case, missing keys) goes through the
+        generic drama.parse_argument.
+        '''
+        keys,func = self.arg_adapters[name]
+        if isinstance(arg, dict) and len(arg) == len(keys):
+            try:
+                values = [arg[k] for k in keys]
+            except KeyError:
+                pass
+            else:
+                return func(*values)
+        args,kwargs = drama.parse_argument(arg)
+        return func(*args,**kwargs)
+    
     def power_args(self, band, enable):
         return int(band), int(enable)
     
     def POWER(self, msg):
-        args,kwargs = drama.parse_argument(msg.arg)
-        band,enable = self.power_args(*args,**kwargs)
-        frame = {3:self.b3_frame, 6:self.b6_frame, 7:self.b7_frame}[band]
+        band,enable = self.adapt_args('POWER', msg.arg)
+        frame = self.band_frames[band]
         frame.power_action = True
         frame.power_on_button['state'] = 'disabled'
         frame.power_off_button['state'] = 'disabled'
@@ -1198,184 +1398,71 @@ class App(tk.Frame):
             # wait for update to reenable buttons
         # App.POWER
     
+    def make_forward_action(self, name, keys, args_func, buttons_func, timeout):
+        '''
+        Return an action that obeys the namakanui task action of the same name,
+        passing on the args_func(*keys) values as keywords.  The widgets from
+        buttons_func(*values) are disabled until the obey completes or times out.
+        '''
+        if keys:
+            self.arg_adapters[name] = (keys, args_func)
+        single = len(keys) == 1
+        def action(msg):
+            values = ()
+            if keys:
+                values = self.adapt_args(name, msg.arg)
+                if single:
+                    values = (values,)
+            buttons = buttons_func(*values)
+            for button in buttons:
+                button['state'] = 'disabled'
+            try:
+                drama.interested()  # in MsgOut/ErsOut
+                tid = drama.obey(namakanui_taskname, name, **dict(zip(keys, values)))
+                self.wait_loop(tid, timeout, name)
+            except:
+                log.exception('exception in %s', name)
+                raise
+            finally:
+                for button in buttons:
+                    button['state'] = 'normal'
+        # DRAMA uses the function name as the action name
+        action.__name__ = name
+        action.__qualname__ = 'App.' + name
+        return action
+        # App.make_forward_action
+    
     def lock_sb_switch_args(self, band):
         return int(band)
-
-    def LOCK_SB_SWITCH(self, msg):
-        args,kwargs = drama.parse_argument(msg.arg)
-        band = self.lock_sb_switch_args(*args,**kwargs)
-        frame = {3:self.b3_frame, 6:self.b6_frame, 7:self.b7_frame}[band]
-        frame.lock_sb_switch_button['state'] = 'disabled'
-        try:
-            drama.interested()
-            tid = drama.obey(namakanui_taskname, "LOCK_SB_SWITCH", band=band)
-            self.wait_loop(tid, 10, "LOCK_SB_SWITCH")
-        except:
-            log.exception('exception in LOCK_SB_SWITCH')
-            raise
-        finally:
-            frame.lock_sb_switch_button['state'] = 'normal'
-        # App.LOCK_SB_SWITCH
-
+    
     def tune_args(self, band, lo_ghz, voltage):
         return int(band), float(lo_ghz), float(voltage)
     
-    def TUNE(self, msg):
-        args,kwargs = drama.parse_argument(msg.arg)
-        band,lo_ghz,voltage = self.tune_args(*args,**kwargs)
-        frame = {3:self.b3_frame, 6:self.b6_frame, 7:self.b7_frame}[band]
-        frame.tune_button['state'] = 'disabled'
-        try:
-            drama.interested()
-            tid = drama.obey(namakanui_taskname, "TUNE", band=band, lo_ghz=lo_ghz, voltage=voltage)
-            self.wait_loop(tid, 30, "TUNE")
-        except:
-            log.exception('exception in TUNE')
-            raise
-        finally:
-            frame.tune_button['state'] = 'normal'
-        # App.TUNE
-    
     def move_args(self, position):
         return position
     
-    def LOAD_MOVE(self, msg):
-        args,kwargs = drama.parse_argument(msg.arg)
-        position = self.move_args(*args,**kwargs)
-        self.load_frame.move_button['state'] = 'disabled'
-        self.load_frame.home_button['state'] = 'disabled'
-        try:
-            drama.interested()
-            tid = drama.obey(namakanui_taskname, "LOAD_MOVE", position=position)
-            self.wait_loop(tid, 30, "LOAD_MOVE")
-        except:
-            log.exception('exception in LOAD_MOVE')
-            raise
-        finally:
-            self.load_frame.move_button['state'] = 'normal'
-            self.load_frame.home_button['state'] = 'normal'
-        # App.LOAD_MOVE
-    
-    def LOAD_HOME(self, msg):
-        self.load_frame.move_button['state'] = 'disabled'
-        self.load_frame.home_button['state'] = 'disabled'
-        try:
-            drama.interested()
-            tid = drama.obey(namakanui_taskname, "LOAD_HOME")
-            self.wait_loop(tid, 30, "LOAD_HOME")
-        except:
-            log.exception('exception in LOAD_MOVE')
-            raise
-        finally:
-            self.load_frame.move_button['state'] = 'normal'
-            self.load_frame.home_button['state'] = 'normal'
-        # App.LOAD_MOVE
-    
-    # TODO: some convenience functions to reduce this boilerplate might be handy
-    
     def dbm_args(self, dbm):
         dbm = float(dbm)
         return dbm
     
-    def SET_SG_DBM(self, msg):
-        args,kwargs = drama.parse_argument(msg.arg)
-        dbm = self.dbm_args(*args,**kwargs)
-        self.reference_frame.dbm_button['state'] = 'disabled'
-        try:
-            drama.interested()
-            tid = drama.obey(namakanui_taskname, "SET_SG_DBM", dbm=dbm)
-            self.wait_loop(tid, 5, "SET_SG_DBM")
-        except:
-            log.exception('exception in SET_SG_DBM')
-            raise
-        finally:
-            self.reference_frame.dbm_button['state'] = 'normal'
-        # App.SET_SG_DBM
-    
     def hz_args(self, hz):
         hz = float(hz)
         if hz < 9e3 or hz > 32e9:
             raise ValueError(f'hz {hz} outside [9 KHz, 32 GHz] range')
         return hz
     
-    def SET_SG_HZ(self, msg):
-        args,kwargs = drama.parse_argument(msg.arg)
-        hz = self.hz_args(*args,**kwargs)
-        self.reference_frame.hz_button['state'] = 'disabled'
-        try:
-            drama.interested()
-            tid = drama.obey(namakanui_taskname, "SET_SG_HZ", hz=hz)
-            self.wait_loop(tid, 5, "SET_SG_HZ")
-        except:
-            log.exception('exception in SET_SG_HZ')
-            raise
-        finally:
-            self.reference_frame.hz_button['state'] = 'normal'
-        # App.SET_SG_HZ
-    
     def out_args(self, out):
         return int(bool(out))
     
-    def SET_SG_OUT(self, msg):
-        args,kwargs = drama.parse_argument(msg.arg)
-        out = self.out_args(*args,**kwargs)
-        self.reference_frame.on_button['state'] = 'disabled'
-        self.reference_frame.off_button['state'] = 'disabled'
-        try:
-            drama.interested()
-            tid = drama.obey(namakanui_taskname, "SET_SG_OUT", out=out)
-            self.wait_loop(tid, 5, "SET_SG_OUT")
-        except:
-            log.exception('exception in SET_SG_OUT')
-            raise
-        finally:
-            self.reference_frame.on_button['state'] = 'normal'
-            self.reference_frame.off_button['state'] = 'normal'
-        # App.SET_SG_OUT
-    
     def att_args(self, att):
         return int(att)
     
-    def SET_ATT(self, msg):
-        args,kwargs = drama.parse_argument(msg.arg)
-        att = self.att_args(*args, **kwargs)
-        self.photonics_frame.att_button['state'] = 'disabled'
-        try:
-            drama.interested()
-            tid = drama.obey(namakanui_taskname, "SET_ATT", att=att)
-            self.wait_loop(tid, 5, "SET_ATT")
-        except:
-            log.exception('exception in SET_ATT')
-            raise
-        finally:
-            self.photonics_frame.att_button['state'] = 'normal'
-        # App.SET_ATT
-    
     def band_args(self, band):
         band = int(band)
-        if band not in [3,6,7]:
-            raise ValueError(f'BAND {band} not one of [3,6,7]')
+        if band not in self.band_frames:
+            raise ValueError(f'BAND {band} not one of {sorted(self.band_frames)}')
         return band
     
-    def SET_BAND(self, msg):
-        args,kwargs = drama.parse_argument(msg.arg)
-        band = self.band_args(*args,**kwargs)
-        self.stsr_frame.b3_button['state'] = 'disabled'
-        self.stsr_frame.b6_button['state'] = 'disabled'
-        self.stsr_frame.b7_button['state'] = 'disabled'
-        try:
-            drama.interested()
-            tid = drama.obey(namakanui_taskname, "SET_BAND", band=band)
-            self.wait_loop(tid, 5, "SET_BAND")
-        except:
-            log.exception('exception in SET_BAND')
-            raise
-        finally:
-            self.stsr_frame.b3_button['state'] = 'normal'
-            self.stsr_frame.b6_button['state'] = 'normal'
-            self.stsr_frame.b7_button['state'] = 'normal'
-        # App.SET_BAND
-    
     def MSG_TEST(self, msg):
         '''
         Hidden action (use a ditscmd) designed to test the message textbox.
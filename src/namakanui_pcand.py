@@ -35,7 +35,7 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 '''
 
-import argparse, logging, select, selectors, socket, sys, time, types
+import argparse, collections, logging, os, selectors, socket, struct, sys, time, types
 import namakanui.util
 
 namakanui.util.setup_logging()
@@ -53,6 +53,9 @@ if args.verbose:
     logging.root.handlers[0].setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
     log.setLevel(logging.DEBUG)
 
+# packet hex dumps are only built when debugging; this is the hot path.
+debug = log.isEnabledFor(logging.DEBUG)
+
 cfg = namakanui.util.get_config('femc.ini')['femc']
 pcan_type = cfg['pcan_type'].lower()  # tcp or udp
 lan2can_ip = cfg['lan2can_ip']  # PCAN IP
@@ -60,10 +63,25 @@ lan2can_port = int(cfg['lan2can_port'])
 can2lan_port = int(cfg['can2lan_port'])  # on localhost
 pcand_port = int(cfg['pcand_port'])
 
+# optionally pin the relay to one cpu and run it at realtime priority,
+# to keep scheduler wakeup jitter off the CANbus round trip.
+# SCHED_FIFO needs root or CAP_SYS_NICE, see nk_pcand.service.
+if 'pcand_cpu' in cfg:
+    log.debug('setting cpu affinity to %s', cfg['pcand_cpu'])
+    os.sched_setaffinity(0, {int(cfg['pcand_cpu'])})
+if 'pcand_rtprio' in cfg:
+    rtprio = int(cfg['pcand_rtprio'])
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(rtprio))
+        log.debug('running with SCHED_FIFO priority %d', rtprio)
+    except PermissionError:
+        log.warning('no permission for SCHED_FIFO priority %d, using default scheduler', rtprio)
+
 # connect to PCAN
 if pcan_type == 'tcp':
     log.debug('creating tcp lan2can socket')
     lan2can = socket.socket()
+    lan2can.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 else:
     log.debug('creating udp lan2can socket')
     lan2can = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -100,74 +118,224 @@ listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 listener.bind(('0.0.0.0', pcand_port))
 listener.listen()
 
+# PCAN sockets are non-blocking from here on.  relay() keeps one request
+# in flight on the PCAN and picks up its reply from can2lan in the same
+# selector loop as the clients, so other clients can still connect and
+# queue requests while the CANbus round trip is in progress.
+lan2can.setblocking(False)
+can2lan.setblocking(False)
+
+# pcan frame layout as packed by namakanui/femc.py -- len, type, tag,
+# timestamp, chan, dlc, flags, canid, candata.  the relay only looks at
+# the frame length and the dlc, to tell monitor requests (no data)
+# from control requests.
+pcan_frame_len = struct.calcsize(">HH8x8xxBHI8s")  # 36
+pcan_dlc_offset = struct.calcsize(">HH8x8xx")
+
+# past max_clients connections, stop accepting and leave newcomers
+# in the listen backlog until somebody disconnects.  0 for no limit.
+max_clients = int(cfg['pcand_max_clients']) if 'pcand_max_clients' in cfg else 0
+can2lan_timeout = 1.0
+
 def messenger(msg):
-    '''send msg to lan2can and get response from can2lan'''
-    # clear out any leftover junk in the sockets -- might not be necessary
-    r = select.select([lan2can, can2lan], [], [], 0.0)[0]
-    while r:
-        for ri in r:    ri.recv(64) 
-        r = select.select([lan2can, can2lan], [], [], 0.0)[0]
-
-    #_w = select.select([], [lan2can], [], 1.0)[1]   # timeout = 1.0
-    # Probably not necessary; rely on socket's timeout instead
-    lan2can.sendall(msg)
-    log.debug('sent to lan2can: %s', msg.hex())
+    '''send msg to lan2can; relay() collects the response from can2lan'''
+    # clear out any leftover junk on lan2can -- might not be necessary.
+    # can2lan is not drained here: relay() already reads it whole packets
+    # at a time and drops any that arrive with no request in flight,
+    # while a raw drain could split a tcp packet and lose framing.
+    try:
+        while lan2can.recv(64):
+            pass
+    except BlockingIOError:
+        pass
 
-    #_r = select.select([can2lan], [], [], 1.0)[0]   # timeout = 1.0
-    packet = can2lan.recv(36)
-    log.debug('can2lan recv:    %s', packet.hex())
-    if not packet:
-        log.error('lost PCAN connection')
-        raise Exception('lost PCAN connection')
-    else:
-        return packet
+    # a 36-byte packet always fits in the idle send buffer
+    lan2can.sendall(msg)
+    if debug:
+        log.debug('sent to lan2can: %s', msg.hex())
 
 def relay():
     '''relay communications between client programs and the PCAN'''
     sel = selectors.DefaultSelector()
     sel.register(listener, selectors.EVENT_READ, data=None)
+    sel.register(can2lan, selectors.EVENT_READ, data=None)
+    
+    # the PCAN protocol is strictly request/response, so requests wait
+    # here in arrival order and only one is sent to the PCAN at a time.
+    queue = collections.deque()  # (to_femc, [(sock, data), ...])
+    monitors = {}  # to_femc: queue entry, for queued monitor requests
+    inflight = None  # [(sock, data), ...] waiting on can2lan
+    deadline = 0.0
+    nclients = 0
+    
+    # can2lan packets are read into one reusable buffer.  over tcp a
+    # packet can arrive in pieces, so keep reading until it's complete.
+    packet = bytearray(pcan_frame_len)
+    packet_view = memoryview(packet)
+    packet_len = 0
+    pcan_stream = can2lan.type == socket.SOCK_STREAM
 
     def accept_wrapper(sock):
+        nonlocal nclients
         conn, addr = sock.accept()  # Should be ready to read
         log.debug(f"{time.strftime('%X')} @RELAY - accepted from {addr}")
         conn.setblocking(False)
-        data = types.SimpleNamespace(addr=addr, inb=b"", outb=b"")
+        # clients keep their connection open for many small requests;
+        # don't let Nagle hold back a reply waiting for an ACK.
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        data = types.SimpleNamespace(addr=addr, inb=b"", outb=b"", pending=0)
         events = selectors.EVENT_READ
         sel.register(conn, events, data=data)
+        nclients += 1
+        if nclients == max_clients:
+            log.warning('%d clients connected, holding new connections', nclients)
+            sel.unregister(listener)
+    
+    def drop_client(sock, data):
+        nonlocal nclients
+        if sock.fileno() < 0:  # already dropped
+            return
+        log.debug('dropping client %s', data.addr)
+        sel.unregister(sock)
+        sock.close()
+        if nclients == max_clients:
+            sel.register(listener, selectors.EVENT_READ, data=None)
+        nclients -= 1
+    
+    def send_next():
+        '''send the next queued request to the PCAN'''
+        nonlocal inflight, deadline
+        while queue:
+            to_femc, clients = queue.popleft()
+            monitors.pop(to_femc, None)
+            clients = [c for c in clients if c[0].fileno() >= 0]
+            if not clients:  # everyone dropped while waiting
+                continue
+            messenger(to_femc)
+            inflight = clients
+            deadline = time.monotonic() + can2lan_timeout
+            return
+    
+    def pcan_reply():
+        '''hand a can2lan packet back to the client whose request is in flight'''
+        nonlocal inflight, packet_len
+        try:
+            n = can2lan.recv_into(packet_view[packet_len:])
+        except BlockingIOError:
+            return
+        if not n:
+            log.error('lost PCAN connection')
+            raise Exception('lost PCAN connection')
+        packet_len += n
+        if pcan_stream and packet_len < pcan_frame_len:
+            return
+        reply = packet_view[:packet_len]
+        packet_len = 0
+        if debug:
+            log.debug('can2lan recv:    %s', reply.hex())
+        if inflight is None:  # leftover junk, nobody is waiting for it
+            return
+        clients = inflight
+        inflight = None
+        for sock, data in clients:
+            data.pending -= 1
+            if sock.fileno() < 0:
+                continue
+            try:
+                send_reply(sock, data, reply)
+                if debug:
+                    log.debug('reply to client %s with %s', data.addr, reply.hex())
+            except OSError:
+                log.exception('send exception for client %s', data.addr)
+                drop_client(sock, data)
+        send_next()
+    
+    def send_reply(sock, data, reply):
+        '''send reply to a client, holding whatever doesn't fit in data.outb'''
+        # reply right away instead of registering for EVENT_WRITE and
+        # back again; a 36-byte reply fits in any idle send buffer,
+        # and that saves two epoll_ctl calls and a select per request.
+        # only a client that stops reading its replies needs EVENT_WRITE.
+        if data.outb:  # already backed up, keep replies in order
+            data.outb += reply
+            return
+        try:
+            n = sock.send(reply)
+        except BlockingIOError:
+            n = 0
+        if n < len(reply):
+            data.outb = bytes(reply[n:])
+            sel.modify(sock, selectors.EVENT_READ | selectors.EVENT_WRITE, data=data)
+    
+    def enqueue(sock, data, to_femc):
+        '''queue a 36-byte client request for the PCAN'''
+        # monitor requests carry no data (dlc is zero).
+        # if several clients poll the same point while the PCAN is
+        # busy, send it once and give them all the reply.  control
+        # requests are never merged, and a client with requests
+        # already queued gets its own entry so replies stay in order.
+        data.pending += 1
+        monitor = to_femc[pcan_dlc_offset] == 0
+        entry = monitors.get(to_femc) if monitor else None
+        if entry and data.pending == 1:
+            entry[1].append((sock, data))
+            return
+        entry = (to_femc, [(sock, data)])
+        queue.append(entry)
+        if monitor:
+            monitors[to_femc] = entry
+        if inflight is None:
+            send_next()
     
     def service_connection(key, mask):
         sock = key.fileobj
         data = key.data
         if mask & selectors.EVENT_READ:
             try:
-                to_femc = sock.recv(36)
-                log.debug('recv %d bytes:   %s from client %s', len(to_femc), 
-                    to_femc.hex(), sock.getpeername())
+                chunk = sock.recv(4096)
+                if debug:
+                    log.debug('recv %d bytes:   %s from client %s', len(chunk), 
+                        chunk.hex(), data.addr)
             except:
-                to_femc = b''
-                log.exception('recv exception for client %s', sock.getpeername())
-            if len(to_femc) < 36:  # bad/lost/closed connection
-                log.debug('dropping client %s', sock.getpeername())
-                sel.unregister(sock)
-                sock.close()
+                chunk = b''
+                log.exception('recv exception for client %s', data.addr)
+            if not chunk:  # bad/lost/closed connection
+                drop_client(sock, data)
+                return
+            # tcp may split or merge requests; only whole packets are sent on.
+            # usually a recv is exactly one packet, so skip the buffering.
+            if not data.inb and len(chunk) == pcan_frame_len:
+                enqueue(sock, data, chunk)
             else:
-                data.outb = messenger(to_femc)    #lan2can & can2lan, blocks until response
-                sel.modify(sock, selectors.EVENT_WRITE, data=data)
-
-        if mask & selectors.EVENT_WRITE:
-            if data.outb:
-                sock.sendall(data.outb)
-                log.debug('reply to client %s with %s', sock.getpeername(), 
-                    data.outb.hex())
-                data.outb = b""
-            sel.modify(sock, selectors.EVENT_READ, data=data)
+                data.inb += chunk
+                while len(data.inb) >= pcan_frame_len:
+                    to_femc = data.inb[:pcan_frame_len]
+                    data.inb = data.inb[pcan_frame_len:]
+                    enqueue(sock, data, to_femc)
+        if mask & selectors.EVENT_WRITE and sock.fileno() >= 0:
+            try:
+                n = sock.send(data.outb)
+            except OSError:
+                log.exception('send exception for client %s', data.addr)
+                drop_client(sock, data)
+                return
+            data.outb = data.outb[n:]
+            if not data.outb:
+                sel.modify(sock, selectors.EVENT_READ, data=data)
 
     while True:
-        events = sel.select()
+        timeout = None
+        if inflight is not None:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                raise socket.timeout('timeout waiting for can2lan reply')
+        events = sel.select(timeout)
         for key, mask in events:
-            if key.data is None:
+            if key.fileobj is can2lan:
+                pcan_reply()
+            elif key.data is None:
                 accept_wrapper(key.fileobj)
-            else:
+            elif key.fileobj.fileno() >= 0:  # not dropped earlier this batch
                 service_connection(key, mask)
 
 log.debug('starting the pcand relay server')
@@ -22,6 +22,7 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 '''
 
 import jac_sw
+import time
 import logging
 import argparse
 import namakanui.cart
@@ -44,25 +45,60 @@ def try_tune(cart, lo_ghz, voltage, msg, skip_servo_pa, lock_only):
         cart.tune(lo_ghz, voltage, skip_servo_pa=skip_servo_pa, lock_only=lock_only)
     except namakanui.cart.BadLock as e:
         log.error('tune failed at %.3f ghz, %s', lo_ghz, msg)
-    cart.update_all()
+    update_pll(cart)
     # try_tune
 
-def try_att(cart, photonics, lo_ghz, voltage, att, skip_servo_pa, lock_only, delay_secs):
+def update_pll(cart):
+    '''Helper function used by tune(): read only the PLL state checked by
+       the tuning loops, rather than every parameter via cart.update_all().'''
+    if cart.state['pd_enable'] and not cart.sim_warm:
+        cart.state['pll_if_power'] = cart.femc.get_cartridge_lo_pll_if_total_power(cart.ca)
+        cart.state['pll_unlock'] = cart.femc.get_cartridge_lo_pll_unlock_detect_latch(cart.ca)
+    else:
+        cart.state['pll_if_power'] = 0.0
+        cart.state['pll_unlock'] = 0
+    # update_pll
+
+def set_and_settle(cart, step, delay_secs, settle_tol, poll_secs=0.005):
+    '''Helper function used by tune(): call step() to set a new att/dbm,
+       then sleep delay_secs for the PLL to settle.
+       If settle_tol (volts) is given, instead poll PLL IF power and return
+       early once it has moved more than settle_tol from its value before
+       the step and then two consecutive readings agree within settle_tol.
+       A step that doesn't visibly move the power waits the full delay_secs.'''
+    if not settle_tol or not cart.state['pd_enable'] or cart.sim_warm:
+        step()
+        cart.sleep(delay_secs)
+        return
+    get_pll_if_power = cart.femc.get_cartridge_lo_pll_if_total_power
+    start = get_pll_if_power(cart.ca)
+    step()
+    t_end = time.monotonic() + delay_secs
+    prev = None
+    while time.monotonic() < t_end:
+        cart.sleep(poll_secs)
+        ifp = get_pll_if_power(cart.ca)
+        if abs(ifp - start) <= settle_tol:
+            continue  # response hasn't started yet
+        if prev is not None and abs(ifp - prev) < settle_tol:
+            break
+        prev = ifp
+    # set_and_settle
+
+def try_att(cart, photonics, lo_ghz, voltage, att, skip_servo_pa, lock_only, delay_secs, settle_tol=None):
     '''Helper function used by tune(): set new attenuation, retune if needed.'''
-    photonics.set_attenuation(att)
-    cart.sleep(delay_secs)
+    set_and_settle(cart, lambda: photonics.set_attenuation(att), delay_secs, settle_tol)
     photonics.update()
-    cart.update_all()
+    update_pll(cart)
     if cart.state['pll_unlock']:
         try_tune(cart, lo_ghz, voltage, 'att %d'%(att), skip_servo_pa, lock_only)
     # try_att
 
-def try_dbm(cart, reference, lo_ghz, voltage, dbm, skip_servo_pa, lock_only, delay_secs):
+def try_dbm(cart, reference, lo_ghz, voltage, dbm, skip_servo_pa, lock_only, delay_secs, settle_tol=None):
     '''Helper function used by tune(): set a new dbm, retune if needed.'''
-    reference.set_dbm(dbm)
-    cart.sleep(delay_secs)
+    set_and_settle(cart, lambda: reference.set_dbm(dbm), delay_secs, settle_tol)
     reference.update()
-    cart.update_all()
+    update_pll(cart)
     if cart.state['pll_unlock']:
         try_tune(cart, lo_ghz, voltage, 'dbm %.2f'%(dbm), skip_servo_pa, lock_only)
     # try_dbm
@@ -72,7 +108,7 @@ def tune(instrument, band, lo_ghz, voltage=0.0,
          lock_side=None, pll_if=[-.8,-2.5],
          att_ini=True, att_start=None, att_min=None,
          dbm_ini=True, dbm_start=None, dbm_max=None,
-         skip_servo_pa=False, lock_only=False):
+         skip_servo_pa=False, lock_only=False, settle_tol=None):
     '''Tune the receiver and optimize PLL IF power by adjusting
        photonics attenuation and/or reference output power.
        Returns True on success, False on failure.  (TODO throw on failure?)
@@ -92,6 +128,9 @@ def tune(instrument, band, lo_ghz, voltage=0.0,
         dbm_max:   If None, is (dbm_ini ? 3 : reference.max_dbm)
         skip_servo_pa: If true, PA not adjusted for target mixer current.
         lock_only: If true, pa/lna/sis/magnets held at previous values.
+        settle_tol: If given (volts), end the PLL settling delay after each
+           att/dbm step early once PLL IF power has moved and stopped.
+           Default None always waits the full delay.
     '''
     if instrument:
         config = instrument.config
@@ -223,7 +262,7 @@ def tune(instrument, band, lo_ghz, voltage=0.0,
                 if att < att_min:
                     att = att_min
                 log.info('unlock: %d, pll_if: %.3f; decreasing att to %d', cart.state['pll_unlock'], cart.state['pll_if_power'], att)
-                try_att(cart, photonics, lo_ghz, voltage, att, skip_servo_pa, lock_only, delay_secs)
+                try_att(cart, photonics, lo_ghz, voltage, att, skip_servo_pa, lock_only, delay_secs, settle_tol)
             # increase attenuation (decrease power) if too strong
             datt = max(2, int(round(photonics.counts_per_db/3)))
             while (not cart.state['pll_unlock']) and cart.state['pll_if_power'] < pll_range[1] and att < att_max:
@@ -231,7 +270,7 @@ def tune(instrument, band, lo_ghz, voltage=0.0,
                 if att > att_max:
                     att = att_max
                 log.info('unlock: %d, pll_if: %.3f; increasing att to %d', cart.state['pll_unlock'], cart.state['pll_if_power'], att)
-                try_att(cart, photonics, lo_ghz, voltage, att, skip_servo_pa, lock_only, delay_secs)
+                try_att(cart, photonics, lo_ghz, voltage, att, skip_servo_pa, lock_only, delay_secs, settle_tol)
             # slowly decrease attenuation to target (and relock if needed)
             datt = max(1, int(round(photonics.counts_per_db/9)))
             while (cart.state['pll_unlock'] or cart.state['pll_if_power'] > pll_range[0]) and att > att_min:
@@ -239,31 +278,48 @@ def tune(instrument, band, lo_ghz, voltage=0.0,
                 if att < att_min:
                     att = att_min
                 log.info('unlock: %d, pll_if: %.3f; decreasing att to %d', cart.state['pll_unlock'], cart.state['pll_if_power'], att)
-                try_att(cart, photonics, lo_ghz, voltage, att, skip_servo_pa, lock_only, delay_secs)
+                try_att(cart, photonics, lo_ghz, voltage, att, skip_servo_pa, lock_only, delay_secs, settle_tol)
         
         ### REFERENCE OUTPUT POWER ADJUSTMENT
         if not reference.simulate:
             # quickly increase power if needed
+            dbm_weak = dbm_min  # highest dbm known (or assumed) to be too weak
             while (cart.state['pll_unlock'] or cart.state['pll_if_power'] > pll_range[0]) and dbm < dbm_max:
+                dbm_weak = dbm
                 dbm += 1.0
                 if dbm > dbm_max:
                     dbm = dbm_max
                 log.info('unlock: %d, pll_if: %.3f; increasing dbm to %.2f', cart.state['pll_unlock'], cart.state['pll_if_power'], dbm)
-                try_dbm(cart, reference, lo_ghz, voltage, dbm, skip_servo_pa, lock_only, delay_secs)
-            # decrease power if too strong
-            while (not cart.state['pll_unlock']) and cart.state['pll_if_power'] < pll_range[1] and dbm > dbm_min:
-                dbm -= 0.3
-                if dbm < dbm_min:
-                    dbm = dbm_min
-                log.info('unlock: %d, pll_if: %.3f; decreasing dbm to %.2f', cart.state['pll_unlock'], cart.state['pll_if_power'], dbm)
-                try_dbm(cart, reference, lo_ghz, voltage, dbm, skip_servo_pa, lock_only, delay_secs)
+                try_dbm(cart, reference, lo_ghz, voltage, dbm, skip_servo_pa, lock_only, delay_secs, settle_tol)
+            # decrease power if too strong.  pll_if_power is monotonic in dbm,
+            # so bisect between the last weak and current strong settings
+            # rather than stepping down linearly.
+            if (not cart.state['pll_unlock']) and cart.state['pll_if_power'] < pll_range[1] and dbm > dbm_min:
+                dbm_strong = dbm
+                while dbm_strong - dbm_weak > 0.1:
+                    dbm = (dbm_weak + dbm_strong) / 2
+                    log.info('unlock: %d, pll_if: %.3f; bisecting dbm to %.2f', cart.state['pll_unlock'], cart.state['pll_if_power'], dbm)
+                    try_dbm(cart, reference, lo_ghz, voltage, dbm, skip_servo_pa, lock_only, delay_secs, settle_tol)
+                    if cart.state['pll_unlock'] or cart.state['pll_if_power'] > pll_range[0]:
+                        dbm_weak = dbm
+                    elif cart.state['pll_if_power'] < pll_range[1]:
+                        dbm_strong = dbm
+                    else:
+                        break  # in range
+                if cart.state['pll_unlock'] or cart.state['pll_if_power'] > pll_range[0]:
+                    # ended on the weak side; fall back to the strong (locked) setting
+                    dbm = dbm_strong
+                    log.info('unlock: %d, pll_if: %.3f; increasing dbm to %.2f', cart.state['pll_unlock'], cart.state['pll_if_power'], dbm)
+                    try_dbm(cart, reference, lo_ghz, voltage, dbm, skip_servo_pa, lock_only, delay_secs, settle_tol)
             # slowly increase power to target (and relock if needed)
             while (cart.state['pll_unlock'] or cart.state['pll_if_power'] > pll_range[0]) and dbm < dbm_max:
                 dbm += 0.1
                 if dbm > dbm_max:
                     dbm = dbm_max
                 log.info('unlock: %d, pll_if: %.3f; increasing dbm to %.2f', cart.state['pll_unlock'], cart.state['pll_if_power'], dbm)
-                try_dbm(cart, reference, lo_ghz, voltage, dbm, skip_servo_pa, lock_only, delay_secs)
+                try_dbm(cart, reference, lo_ghz, voltage, dbm, skip_servo_pa, lock_only, delay_secs, settle_tol)
+        
+        cart.update_all()  # full state once, after the tuning loops
         
         if cart.state['pll_unlock']:
             log.error('unlocked at %.3f ghz, pll_if %.3f, final att %d, dbm %.2f. setting power to safe levels.', lo_ghz, cart.state['pll_if_power'], att, dbm)
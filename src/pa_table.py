@@ -51,6 +51,7 @@ parser.add_argument('--lo', help='range ghz')
 parser.add_argument('--vg', help='range (for b6, use -.40:.14:.01)')
 parser.add_argument('--vd', type=float, default=2.5, help='vd to use during vg sweep')
 parser.add_argument('--lock_side', nargs='?', choices=['below','above'], default='above')
+parser.add_argument('--golden', action='store_true', help='golden-section search for max vg instead of full sweep;\nassumes unimodal mixer current vs vg')
 args = parser.parse_args()
 
 los = namakanui.util.parse_range(args.lo, maxlen=1e3)
@@ -81,18 +82,65 @@ def smooth(y):
     # assume equal x spacing
     # mirror data around endpoints
     # dy = y-y0; ym = y0 - dy = y0 - (y-y0) = 2y0 - y
-    ym0 = 2*y[0] - y[1:4]
-    ym1 = 2*y[-1] - y[-4:-1]
-    ym0 = ym0[::-1]
-    ym1 = ym1[::-1]
-    yb = numpy.concatenate((ym0,y,ym1))
+    # which is numpy's odd reflection (plain 'reflect' would give y instead).
+    yb = numpy.pad(y, 3, mode='reflect', reflect_type='odd')
     w = numpy.array([1,4,8,10,8,4,1])
     ws = w.sum()
-    s = y.copy()
-    for i in range(len(s)):
-        yw = yb[i:i+7]*w
-        s[i] = yw.sum()/ws
-    return s
+    # w is symmetric, so convolution is the same as the sliding weighted sum;
+    # 'valid' drops the mirrored padding, leaving len(y) points.
+    return numpy.convolve(yb, w, mode='valid') / ws
+
+def measure(vg):
+    '''Set PA gate voltages vg [pol0, pol1]; return 10-reading average
+       of the four mixer currents in uA, ordered [po*2 + sb].'''
+    cart.femc.set_cartridge_lo_pa_gate_voltages(cart.ca, vg)
+    #cart.update_all()  # not necessary
+    return numpy.array(cart.femc.get_sis_currents(cart.ca, 10)) * 1e3  # mA to uA
+
+def search_vg():
+    '''
+    Golden-section search over vgs for max mixer current difference,
+    both polarizations at once since each has its own PA gate.
+    Unlike the full sweep there's no smoothing, so this relies on each
+    vg-ua curve being unimodal.  Return index into vgs for each pol.
+    '''
+    seen = [{}, {}]  # {vgs index: ua difference} for each pol
+    def probe(idx):
+        ua = measure([vgs[idx[0]], vgs[idx[1]]])
+        seen[0][idx[0]] = ua[1] - ua[0]
+        seen[1][idx[1]] = ua[3] - ua[2]
+    lo = [0, 0]
+    hi = [len(vgs)-1]*2
+    a = [round(0.382*hi[0])]*2
+    b = [max(hi[0]-a[0], a[0]+1)]*2
+    if hi[0] > 3:
+        probe(a)
+        probe(b)
+    while hi[0]-lo[0] > 3 or hi[1]-lo[1] > 3:
+        new = []
+        for p in range(2):
+            if hi[p]-lo[p] <= 3:
+                new.append(a[p])  # this pol is done, just hold it still
+                continue
+            if seen[p][a[p]] < seen[p][b[p]]:  # max in (a, hi]
+                lo[p] = a[p]
+                x = lo[p] + hi[p] - b[p]
+                if x == b[p]:
+                    x += 1
+                a[p],b[p] = sorted((b[p], x))
+            else:  # max in [lo, b)
+                hi[p] = b[p]
+                x = lo[p] + hi[p] - a[p]
+                if x == a[p]:
+                    x -= 1
+                a[p],b[p] = sorted((a[p], x))
+            new.append(x)
+        probe(new)
+    # check whatever is left of the brackets point by point
+    rest = [[i for i in range(lo[p], hi[p]+1) if i not in seen[p]] for p in range(2)]
+    while rest[0] or rest[1]:
+        probe([rest[p].pop() if rest[p] else lo[p] for p in range(2)])
+    return [max(range(lo[p], hi[p]+1), key=seen[p].get) for p in range(2)]
 
 # main loops
 for lo_ghz in los:
@@ -105,24 +153,14 @@ for lo_ghz in los:
     logging.info('set pa %.2f', args.vd)
     cart._set_pa([args.vd, args.vd])
     
-    ua = [[], [], [], []]
-    for vg in vgs:
-        cart.femc.set_cartridge_lo_pa_pol_gate_voltage(cart.ca, 0, vg)
-        cart.femc.set_cartridge_lo_pa_pol_gate_voltage(cart.ca, 1, vg)
-        #cart.update_all()  # not necessary
-        # average 10 mixer current readings
-        n = 10
-        sis_c = [0.0]*4
-        for i in range(n):
-            for po in range(2):
-                for sb in range(2):
-                    sis_c[po*2 + sb] += cart.femc.get_sis_current(cart.ca,po,sb)*1e3
-        sis_c = [x/n for x in sis_c]
-        for i,ua_list in enumerate(ua):
-            ua_list.append(sis_c[i])
-    ua = [numpy.array(ua_list) for ua_list in ua]
-    s = [smooth(ua[1]-ua[0]), smooth(ua[3]-ua[2])]
-    si = [y.argmax() for y in s]
+    if args.golden:
+        si = search_vg()
+    else:
+        ua = numpy.empty((4, len(vgs)))
+        for k,vg in enumerate(vgs):
+            ua[:,k] = measure([vg, vg])
+        s = [smooth(ua[1]-ua[0]), smooth(ua[3]-ua[2])]
+        si = [y.argmax() for y in s]
     vg = [vgs[i] for i in si]
     
     pa = nom_vd + vg
@@ -5,9 +5,9 @@ Locutus 2024.03.03
 Simulate a PCAN device and test the communication with what is implemented in namakanui_pcand.py
 '''
 
-import argparse, asyncio, logging, select, selectors, socket, sys, time, types, os
+import argparse, asyncio, collections, logging, selectors, socket, struct, sys, time, types, os
 from multiprocessing import Process
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
 
 logging.basicConfig()   # must set up the root logger
 log = logging.getLogger('pcand')
@@ -20,23 +20,26 @@ args = parser.parse_args()
 if args.verbose:
     log.setLevel(logging.DEBUG)
 
+# packet hex dumps are only built when debugging; this is the hot path.
+debug = log.isEnabledFor(logging.DEBUG)
+
 #%%
 def PCAN():
     sel = selectors.DefaultSelector()
+    replies = collections.deque()   # (due time, data), in arrival order
 
     def accept(sock, mask):
         conn, addr = sock.accept()  # new socket; should be ready
         print(f"{time.strftime('%X')} @PCAN - accepted", conn, 'from', addr)
         conn.setblocking(False)
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         sel.register(conn, selectors.EVENT_READ, read)
 
     def read(conn, mask):
         data = conn.recv(1000)  # Should be ready
         if data:
-            time.sleep(1.0)     # slow the response; NOT CONCURRENT
-            #print(f"{time.strftime('%X')} echoing {data!r} to", conn)
-            #conn.sendall(data)  # Hope it won't block
-            sel.register(pcan2relay, selectors.EVENT_WRITE, (send, data))
+            # slow the response, but keep accepting and reading meanwhile
+            replies.append((time.monotonic() + 1.0, data))
         else:
             print(f"{time.strftime('%X')} No data received. Closing", conn)
             sel.unregister(conn)
@@ -45,7 +48,6 @@ def PCAN():
     def send(conn, data):
         print(f"{time.strftime('%X')} PCAN replies to ", conn)
         conn.sendall(data[:14] + b'--_xx_--sent from PCAN')
-        sel.unregister(conn)    # Without this, conn will keep sending data
 
     sock = socket.socket()
     sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -55,6 +57,7 @@ def PCAN():
     sel.register(sock, selectors.EVENT_READ, accept)
 
     pcan2relay = socket.socket()
+    pcan2relay.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
     #pcan2lan.setblocking(False)
     while True:
         try:
@@ -66,14 +69,16 @@ def PCAN():
             log.debug('PCAN is waiting for the relay server to start')
 
     while True:
-        events = sel.select()
+        timeout = None
+        if replies:
+            timeout = max(0.0, replies[0][0] - time.monotonic())
+        events = sel.select(timeout)
         for key, mask in events:
-            try:
-                callback = key.data[0]
-                callback(key.fileobj, key.data[1])
-            except:
-                callback = key.data
-                callback(key.fileobj, mask)
+            callback = key.data
+            callback(key.fileobj, mask)
+        now = time.monotonic()
+        while replies and replies[0][0] <= now:
+            send(pcan2relay, replies.popleft()[1])
 
 # standalone PCAN process
 log.debug('PCAN running in a process')
@@ -84,6 +89,7 @@ if pcan.is_alive():     log.debug(f'PCAN daemon PID= {pcan.pid}')
 
 #%%
 lan2can = socket.socket()
+lan2can.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 lan2can.settimeout(1)
 lan2can.connect(('localhost', 2000))    ###### PCAN should start first
 
@@ -94,6 +100,7 @@ can2lan_listener.bind(('localhost', 2001))
 can2lan_listener.listen()
 can2lan, _addr = can2lan_listener.accept()      # blocks until PCAN connects
 can2lan.settimeout(5)
+can2lan.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 log.debug('1st message from PCAN: {}'.format(can2lan.recv(128)))
 can2lan_listener.shutdown(socket.SHUT_RDWR)
 can2lan_listener.close()
@@ -103,74 +110,224 @@ listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 listener.bind(('localhost', 2002))
 listener.listen()
 
+# PCAN sockets are non-blocking from here on.  relay() keeps one request
+# in flight on the PCAN and picks up its reply from can2lan in the same
+# selector loop as the clients, so other clients can still connect and
+# queue requests while the CANbus round trip is in progress.
+lan2can.setblocking(False)
+can2lan.setblocking(False)
+
+# pcan frame layout as packed by namakanui/femc.py -- len, type, tag,
+# timestamp, chan, dlc, flags, canid, candata.  the relay only looks at
+# the frame length and the dlc, to tell monitor requests (no data)
+# from control requests.
+pcan_frame_len = struct.calcsize(">HH8x8xxBHI8s")  # 36
+pcan_dlc_offset = struct.calcsize(">HH8x8xx")
+
+# past max_clients connections, stop accepting and leave newcomers
+# in the listen backlog until somebody disconnects.  0 for no limit.
+max_clients = 32
+can2lan_timeout = 5.0
+
 def messenger(msg):
-    '''send msg to lan2can and get response from can2lan'''
-    # clear out any leftover junk in the sockets -- might not be necessary
-    r = select.select([lan2can, can2lan], [], [], 0.0)[0]
-    while r:
-        for ri in r:    ri.recv(64) 
-        r = select.select([lan2can, can2lan], [], [], 0.0)[0]
-
-    #_w = select.select([], [lan2can], [], 1.0)[1]   # timeout = 1.0
-    # Probably not necessary; rely on socket's timeout instead
-    lan2can.sendall(msg)
-    log.debug('sent to lan2can: %s', msg.hex())
+    '''send msg to lan2can; relay() collects the response from can2lan'''
+    # clear out any leftover junk on lan2can -- might not be necessary.
+    # can2lan is not drained here: relay() already reads it whole packets
+    # at a time and drops any that arrive with no request in flight,
+    # while a raw drain could split a tcp packet and lose framing.
+    try:
+        while lan2can.recv(64):
+            pass
+    except BlockingIOError:
+        pass
 
-    #_r = select.select([can2lan], [], [], 1.0)[0]   # timeout = 1.0
-    packet = can2lan.recv(36)
-    log.debug('can2lan recv:    %s', packet.hex())
-    if not packet:
-        log.error('lost PCAN connection')
-        raise Exception('lost PCAN connection')
-    else:
-        return packet
+    # a 36-byte packet always fits in the idle send buffer
+    lan2can.sendall(msg)
+    if debug:
+        log.debug('sent to lan2can: %s', msg.hex())
 
 def relay():
     '''relay communications between client programs and the PCAN'''
     sel = selectors.DefaultSelector()
     sel.register(listener, selectors.EVENT_READ, data=None)
+    sel.register(can2lan, selectors.EVENT_READ, data=None)
+    
+    # the PCAN protocol is strictly request/response, so requests wait
+    # here in arrival order and only one is sent to the PCAN at a time.
+    queue = collections.deque()  # (to_femc, [(sock, data), ...])
+    monitors = {}  # to_femc: queue entry, for queued monitor requests
+    inflight = None  # [(sock, data), ...] waiting on can2lan
+    deadline = 0.0
+    nclients = 0
+    
+    # can2lan packets are read into one reusable buffer.  over tcp a
+    # packet can arrive in pieces, so keep reading until it's complete.
+    packet = bytearray(pcan_frame_len)
+    packet_view = memoryview(packet)
+    packet_len = 0
+    pcan_stream = can2lan.type == socket.SOCK_STREAM
 
     def accept_wrapper(sock):
+        nonlocal nclients
         conn, addr = sock.accept()  # Should be ready to read
         log.debug(f"{time.strftime('%X')} @RELAY - accepted from {addr}")
         conn.setblocking(False)
-        data = types.SimpleNamespace(addr=addr, inb=b"", outb=b"")
+        # clients keep their connection open for many small requests;
+        # don't let Nagle hold back a reply waiting for an ACK.
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        data = types.SimpleNamespace(addr=addr, inb=b"", outb=b"", pending=0)
         events = selectors.EVENT_READ
         sel.register(conn, events, data=data)
+        nclients += 1
+        if nclients == max_clients:
+            log.warning('%d clients connected, holding new connections', nclients)
+            sel.unregister(listener)
+    
+    def drop_client(sock, data):
+        nonlocal nclients
+        if sock.fileno() < 0:  # already dropped
+            return
+        log.debug('dropping client %s', data.addr)
+        sel.unregister(sock)
+        sock.close()
+        if nclients == max_clients:
+            sel.register(listener, selectors.EVENT_READ, data=None)
+        nclients -= 1
+    
+    def send_next():
+        '''send the next queued request to the PCAN'''
+        nonlocal inflight, deadline
+        while queue:
+            to_femc, clients = queue.popleft()
+            monitors.pop(to_femc, None)
+            clients = [c for c in clients if c[0].fileno() >= 0]
+            if not clients:  # everyone dropped while waiting
+                continue
+            messenger(to_femc)
+            inflight = clients
+            deadline = time.monotonic() + can2lan_timeout
+            return
+    
+    def pcan_reply():
+        '''hand a can2lan packet back to the client whose request is in flight'''
+        nonlocal inflight, packet_len
+        try:
+            n = can2lan.recv_into(packet_view[packet_len:])
+        except BlockingIOError:
+            return
+        if not n:
+            log.error('lost PCAN connection')
+            raise Exception('lost PCAN connection')
+        packet_len += n
+        if pcan_stream and packet_len < pcan_frame_len:
+            return
+        reply = packet_view[:packet_len]
+        packet_len = 0
+        if debug:
+            log.debug('can2lan recv:    %s', reply.hex())
+        if inflight is None:  # leftover junk, nobody is waiting for it
+            return
+        clients = inflight
+        inflight = None
+        for sock, data in clients:
+            data.pending -= 1
+            if sock.fileno() < 0:
+                continue
+            try:
+                send_reply(sock, data, reply)
+                if debug:
+                    log.debug('reply to client %s with %s', data.addr, reply.hex())
+            except OSError:
+                log.exception('send exception for client %s', data.addr)
+                drop_client(sock, data)
+        send_next()
+    
+    def send_reply(sock, data, reply):
+        '''send reply to a client, holding whatever doesn't fit in data.outb'''
+        # reply right away instead of registering for EVENT_WRITE and
+        # back again; a 36-byte reply fits in any idle send buffer,
+        # and that saves two epoll_ctl calls and a select per request.
+        # only a client that stops reading its replies needs EVENT_WRITE.
+        if data.outb:  # already backed up, keep replies in order
+            data.outb += reply
+            return
+        try:
+            n = sock.send(reply)
+        except BlockingIOError:
+            n = 0
+        if n < len(reply):
+            data.outb = bytes(reply[n:])
+            sel.modify(sock, selectors.EVENT_READ | selectors.EVENT_WRITE, data=data)
+    
+    def enqueue(sock, data, to_femc):
+        '''queue a 36-byte client request for the PCAN'''
+        # monitor requests carry no data (dlc is zero).
+        # if several clients poll the same point while the PCAN is
+        # busy, send it once and give them all the reply.  control
+        # requests are never merged, and a client with requests
+        # already queued gets its own entry so replies stay in order.
+        data.pending += 1
+        monitor = to_femc[pcan_dlc_offset] == 0
+        entry = monitors.get(to_femc) if monitor else None
+        if entry and data.pending == 1:
+            entry[1].append((sock, data))
+            return
+        entry = (to_femc, [(sock, data)])
+        queue.append(entry)
+        if monitor:
+            monitors[to_femc] = entry
+        if inflight is None:
+            send_next()
     
     def service_connection(key, mask):
         sock = key.fileobj
         data = key.data
         if mask & selectors.EVENT_READ:
             try:
-                to_femc = sock.recv(36)
-                log.debug('recv %d bytes:   %s from client %s', len(to_femc), 
-                    to_femc.hex(), sock.getpeername())
+                chunk = sock.recv(4096)
+                if debug:
+                    log.debug('recv %d bytes:   %s from client %s', len(chunk), 
+                        chunk.hex(), data.addr)
             except:
-                to_femc = b''
-                log.exception('recv exception for client %s', sock.getpeername())
-            if len(to_femc) < 36:  # bad/lost/closed connection
-                log.debug('dropping client %s', sock.getpeername())
-                sel.unregister(sock)
-                sock.close()
+                chunk = b''
+                log.exception('recv exception for client %s', data.addr)
+            if not chunk:  # bad/lost/closed connection
+                drop_client(sock, data)
+                return
+            # tcp may split or merge requests; only whole packets are sent on.
+            # usually a recv is exactly one packet, so skip the buffering.
+            if not data.inb and len(chunk) == pcan_frame_len:
+                enqueue(sock, data, chunk)
             else:
-                data.outb = messenger(to_femc)    #lan2can & can2lan, blocks until response
-                sel.modify(sock, selectors.EVENT_WRITE, data=data)
-
-        if mask & selectors.EVENT_WRITE:
-            if data.outb:
-                sock.sendall(data.outb)
-                log.debug('reply to client %s with %s', sock.getpeername(), 
-                    data.outb.hex())
-                data.outb = b""
-            sel.modify(sock, selectors.EVENT_READ, data=data)
+                data.inb += chunk
+                while len(data.inb) >= pcan_frame_len:
+                    to_femc = data.inb[:pcan_frame_len]
+                    data.inb = data.inb[pcan_frame_len:]
+                    enqueue(sock, data, to_femc)
+        if mask & selectors.EVENT_WRITE and sock.fileno() >= 0:
+            try:
+                n = sock.send(data.outb)
+            except OSError:
+                log.exception('send exception for client %s', data.addr)
+                drop_client(sock, data)
+                return
+            data.outb = data.outb[n:]
+            if not data.outb:
+                sel.modify(sock, selectors.EVENT_READ, data=data)
 
     while True:
-        events = sel.select()
+        timeout = None
+        if inflight is not None:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                raise socket.timeout('timeout waiting for can2lan reply')
+        events = sel.select(timeout)
         for key, mask in events:
-            if key.data is None:
+            if key.fileobj is can2lan:
+                pcan_reply()
+            elif key.data is None:
                 accept_wrapper(key.fileobj)
-            else:
+            elif key.fileobj.fileno() >= 0:  # not dropped earlier this batch
                 service_connection(key, mask)
 
 #%% parallel sockets + burst communication test
@@ -183,21 +340,21 @@ def ding(task):
         repeats = 2
         msg = ''
         for i in range(repeats):
-            _m = f'p={pid}, s={i}'
+            _m = f't={task}, s={i}'
             msg += f'{_m:*<36}'
         s.sendall(msg.encode())
         r = b''
         while len(r) < 36*repeats:
             r += s.recv(1024)
-        print(f'pid={pid}, hold on for 5 seconds before closing the socket.')
+        print(f'task={task}, hold on for 5 seconds before closing the socket.')
         time.sleep(5.0)
         print(s.getsockname(), f'Input: {msg} \t Return: {r}')
 
 def dong():
-    ''' a wrapper because the ContextManager will attempt to finish all processes
-        before proceeding.
+    ''' a wrapper because the ContextManager will attempt to finish all threads
+        before proceeding.  ding is pure socket I/O, so threads are enough.
     '''
-    with ProcessPoolExecutor() as P:
+    with ThreadPoolExecutor(max_workers=3) as P:
         log.debug('simulating parallel connections')
         P.map(ding, range(3))
 
@@ -35,6 +35,7 @@ import os
 import time
 import logging
 import argparse
+import numpy
 import namakanui.instrument
 import namakanui.util
 from namakanui_tune import tune
@@ -56,6 +57,7 @@ parser.add_argument('lo_ghz', type=float)
 parser.add_argument('lock_side', nargs='?', choices=['below','above'], default='above')
 parser.add_argument('--level_only', action='store_true')
 parser.add_argument('--pa', nargs='?', default='0.0:2.5:0.01', help='PA range')
+parser.add_argument('--profile', action='store_true', help='add per-PA seconds columns')
 args = parser.parse_args()
 
 band = args.band
@@ -108,6 +110,8 @@ sys.stdout.write(' ' + ' '.join('ua_dev_'+m for m in mixers))
 sys.stdout.write(' ' + ' '.join('hot_mw_'+p for p in powers))
 sys.stdout.write(' ' + ' '.join('sky_mw_'+p for p in powers))
 sys.stdout.write(' ' + ' '.join('yf_'+p for p in powers))
+if args.profile:
+    sys.stdout.write(' dt_hot dt_sky')
 sys.stdout.write('\n')
 sys.stdout.flush()
 
@@ -118,6 +122,8 @@ ua_dev_index = 5
 hot_p_index = 9
 sky_p_index = hot_p_index + len(powers)
 yf_index = sky_p_index + len(powers)
+dt_index = yf_index + len(powers)
+ncols = dt_index + 2*args.profile
 
 # number of mixer current readings to take per PA (per load)
 # TODO might be able to increase this without impacting runtime due to ITIME,
@@ -125,41 +131,43 @@ yf_index = sky_p_index + len(powers)
 ua_n = 10
 
 
-def ip(target, rows, pas):
+def ip(target, rows, uas, pas):
     if target == 'hot':
         p_index = hot_p_index
+        s_index = 0
+        t_index = dt_index
     else:
         p_index = sky_p_index
+        s_index = ua_n
+        t_index = dt_index + 1
     load.move('b%d_%s'%(band,target))
     
     sys.stderr.write('%s: '%(target))
     sys.stderr.flush()
 
     for i,pa in enumerate(pas):
+        t0 = time.monotonic()
         if (i+1)%20 == 0:
             sys.stderr.write('%.2f%% '%(100.0*i/len(pas)))
             sys.stderr.flush()
-            cart.update_all()
 
         cart._set_pa([pa,pa])
-        rows[i][pa_index] = pa
+        rows[i,pa_index] = pa
         
         # start pmeter reads
         for m in pmeters:
             m.read_init()
         
         for j in range(ua_n):
-            for po in range(2):
-                for sb in range(2):
-                    ua = cart.femc.get_sis_current(cart.ca,po,sb)*1e3
-                    rows[i][ua_avg_index + po*2 + sb] += abs(ua)  # for band 6
-                    rows[i][ua_dev_index + po*2 + sb] += ua*ua
+            # all four mixers in one pipelined round trip, ordered po*2 + sb
+            uas[i,:,s_index+j] = cart.femc.get_sis_currents(cart.ca)
         
         # fetch pmeter results, convert to mW, and reorder by polarization
         dbm = [p for m in pmeters for p in m.read_fetch()]
-        mw = [10.0**(0.1*p) for p in dbm]
-        mw = [mw[0], mw[2], mw[1], mw[3]]
-        rows[i][p_index:p_index+len(mw)] = mw
+        mw = 10.0**(0.1*numpy.array(dbm))
+        rows[i,p_index:p_index+len(mw)] = mw[[0,2,1,3]]
+        if args.profile:
+            rows[i,t_index] = time.monotonic() - t0
     
     sys.stderr.write('\n')
     sys.stderr.flush()
@@ -171,33 +179,28 @@ def ip(target, rows, pas):
 try:
         
     # need to save output rows since they have both hot and sky data.
-    rows = [None]*len(pas)
-    for i in range(len(rows)):
-        rows[i] = [0.0]*(yf_index+len(powers))
+    rows = numpy.zeros((len(pas), ncols))
+    # raw mixer current samples in mA, [pa, po*2 + sb, hot then sky]
+    uas = numpy.zeros((len(pas), 4, ua_n*2))
     
-    if ip('hot', rows, pas):
-        return
-    if ip('sky', rows, pas):
-        return
+    if ip('hot', rows, uas, pas):
+        sys.exit(1)
+    if ip('sky', rows, uas, pas):
+        sys.exit(1)
         
-    n = ua_n*2
-    for r in rows:
-        for j in range(4):
-            # calculate mixer current avg/dev.
-            # iv just saves sum(x) and sum(x^2);
-            # remember stddev is sqrt(E(x^2) - E(x)^2)
-            avg = r[ua_avg_index + j] / n
-            dev = (r[ua_dev_index + j]/n - avg**2)**.5
-            r[ua_avg_index + j] = avg
-            r[ua_dev_index + j] = dev
-        
-        for j in range(len(powers)):
-            # calculate y-factors
-            r[yf_index + j] = r[hot_p_index + j] / r[sky_p_index + j]
-            
-        # write out the data
-        sys.stdout.write(' '.join('%g'%x for x in r) + '\n')
-        sys.stdout.flush()
+    # calculate mixer current avg/dev in uA for all rows at once.
+    # std is computed about the mean from the saved samples, which unlike
+    # sqrt(E(x^2) - E(x)^2) does not lose precision when dev << avg.
+    uas = abs(uas)*1e3  # for band 6
+    rows[:,ua_avg_index:ua_avg_index+4] = uas.mean(axis=2)
+    rows[:,ua_dev_index:ua_dev_index+4] = uas.std(axis=2)
+    
+    # calculate y-factors
+    rows[:,yf_index:dt_index] = rows[:,hot_p_index:sky_p_index] / rows[:,sky_p_index:yf_index]
+    
+    # write out the data
+    numpy.savetxt(sys.stdout, rows, fmt='%g')
+    sys.stdout.flush()
 finally:
     # final timestamp
     sys.stdout.write(time.strftime('# %Y%m%d %H:%M:%S HST\n', time.localtime()))